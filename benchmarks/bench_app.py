@@ -0,0 +1,231 @@
+# --------------------
+# BENCHMARK DE L'APPLICATION (SANS NAVIGATEUR)
+# --------------------
+# Fait tourner app_3.py avec le harnais AppTest de Streamlit : plusieurs sessions simultanées se connectent,
+# parcourent les pages du menu, votent, et l'administrateur réinitialise les votes à la fin. Chaque scénario
+# (taille de l'historique de votes) tourne dans son propre processus, avec son propre fichier de votes.
+#
+# Résultats : latence des reruns par page (p50 / p95 / p99), débit, mémoire maximale, enregistrés en JSON dans
+# benchmarks/results/ pour comparer les versions entre elles.
+#
+# Exemples :
+#   python benchmarks/bench_app.py --sessions 4 --history 1000 100000
+#   python benchmarks/bench_app.py --backend sqlite --history 1000000
+#   python benchmarks/bench_app.py --compare benchmarks/results/ancien.json benchmarks/results/nouveau.json
+
+import argparse
+import csv
+import json
+import os
+import platform
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTATS = os.path.join(RACINE, "benchmarks", "results")
+PAGES = ["Accueil", "Personnages", "Votes", "Tendances", "Album"]
+ADMIN = ("DarkVador", "L'empire")
+VOTANT = ("ObiwanKenobi", "Laforce")
+PERSONNAGES = ["Obiwan Kenobi", "Dark Vador", "Luke Skywalker", "Yoda", "R2D2", "C3PO",
+               "Chewbacca", "Han Solo", "Padmé Amidala", "Anakin Skywalker", "Palpatine", "Maitre Windu"]
+CAMPS = ["Côté Obscur", "Côté Lumineux"]
+
+
+# Crée un historique de `lignes` votes répartis sur les 30 derniers jours :
+def generer_votes(chemin, backend, lignes):
+    debut = datetime.now() - timedelta(days=30)
+    pas = timedelta(days=30) / max(lignes, 1)
+    aleatoire = random.Random(42)
+
+    def votes(n_debut, n_fin):
+        return [((debut + pas * i).isoformat(timespec="seconds"), aleatoire.choice(PERSONNAGES), aleatoire.choice(CAMPS),
+                 f"votant{i % 1000}")
+                for i in range(n_debut, n_fin)]
+
+    if backend == "sqlite":
+        from vote_storage import SqliteVoteStorage
+        stockage = SqliteVoteStorage(chemin)
+        for n in range(0, lignes, 100_000):
+            stockage.add_many(votes(n, min(n + 100_000, lignes)))
+        return
+    with open(chemin, "w", newline="", encoding="utf-8") as f:
+        ecrivain = csv.writer(f, lineterminator="\n")
+        ecrivain.writerow(["timestamp", "personnage", "camp", "username"])
+        for n in range(0, lignes, 100_000):
+            ecrivain.writerows(votes(n, min(n + 100_000, lignes)))
+
+
+def percentiles(mesures):
+    if not mesures:
+        return {}
+    triees = sorted(mesures)
+    rang = lambda p: triees[min(len(triees) - 1, int(len(triees) * p / 100))]
+    return {"n": len(triees), "mean_ms": statistics.mean(triees) * 1000, "p50_ms": rang(50) * 1000,
+            "p95_ms": rang(95) * 1000, "p99_ms": rang(99) * 1000}
+
+
+# Une session : connexion, puis `tours` parcours de toutes les pages avec un vote à chaque passage sur "Votes".
+def session(identifiants, tours, mesures, verrou, admin):
+    from streamlit.testing.v1 import AppTest
+
+    def chrono(nom, action):
+        debut = time.perf_counter()
+        action()
+        duree = time.perf_counter() - debut
+        with verrou:
+            mesures.setdefault(nom, []).append(duree)
+        return at
+
+    at = AppTest.from_file(os.path.join(RACINE, "app_3.py"), default_timeout=600)
+    chrono("login_form", at.run)
+    at.text_input[0].input(identifiants[0])
+    at.text_input[1].input(identifiants[1])
+    at.button[0].click()
+    chrono("login", at.run)
+    if not at.session_state["authentication_status"]:
+        raise RuntimeError(f"connexion impossible pour {identifiants[0]}")
+
+    for _ in range(tours):
+        for page in PAGES:
+            at.query_params["page"] = page
+            chrono(f"page.{page}", at.run)
+            if page == "Votes":
+                bouton = next(b for b in at.button if b.label.startswith("🔥"))
+                bouton.click()
+                chrono("vote", at.run)
+    if admin:
+        at.query_params["page"] = "Votes"
+        at.run()
+        bouton = next(b for b in at.button if b.label.startswith("🔄"))
+        bouton.click()
+        chrono("reset", at.run)
+
+
+# Un scénario, dans un processus dédié (les modules de l'application lisent leur configuration à l'import) :
+def scenario(backend, historique, sessions, tours):
+    dossier = tempfile.mkdtemp(prefix="bench_app_")
+    chemin = os.path.join(dossier, "votes.db" if backend == "sqlite" else "votes.csv")
+    os.environ.update(VOTES_BACKEND=backend, VOTES_FILE=chemin, METRICS_DIR=os.path.join(dossier, "metrics"),
+                      VOTES_WINDOW="0", VOTES_BURST="1000000")        # chaque clic du bench doit écrire un vote, comme avant les règles de vote
+    os.chdir(RACINE)                                                    # images et users.csv sont relatifs au dossier de l'application
+    sys.path.insert(0, RACINE)
+
+    debut = time.perf_counter()
+    generer_votes(chemin, backend, historique)
+    preparation = time.perf_counter() - debut
+
+    mesures, verrou, erreurs = {}, threading.Lock(), []
+
+    def lancer(numero):
+        try:
+            admin = numero == 0
+            session(ADMIN if admin else VOTANT, tours, mesures, verrou, admin)
+        except Exception as erreur:                                     # une session en échec ne doit pas bloquer les autres
+            erreurs.append(repr(erreur))
+
+    debut = time.perf_counter()
+    threads = [threading.Thread(target=lancer, args=(n,)) for n in range(sessions)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    duree = time.perf_counter() - debut
+
+    reruns = sum(len(v) for v in mesures.values())
+    return {
+        "backend": backend,
+        "history": historique,
+        "sessions": sessions,
+        "rounds": tours,
+        "setup_s": preparation,
+        "duration_s": duree,
+        "reruns": reruns,
+        "reruns_per_s": reruns / duree if duree else 0.0,
+        "votes_per_s": len(mesures.get("vote", [])) / duree if duree else 0.0,
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,    # ru_maxrss est en Ko sous Linux
+        "latency": {nom: percentiles(v) for nom, v in sorted(mesures.items())},
+        "errors": erreurs,
+    }
+
+
+def version():
+    try:
+        return subprocess.run(["git", "describe", "--always", "--dirty"], cwd=RACINE,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "inconnue"
+
+
+def afficher(resultat):
+    print(f"\n== {resultat['backend']} / {resultat['history']:,} votes / {resultat['sessions']} sessions "
+          f"({resultat['reruns_per_s']:.1f} reruns/s, {resultat['votes_per_s']:.1f} votes/s, {resultat['max_rss_mb']:.0f} Mo)")
+    print(f"{'mesure':20} {'n':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for nom, p in resultat["latency"].items():
+        print(f"{nom:20} {p['n']:5} {p['p50_ms']:9.1f} {p['p95_ms']:9.1f} {p['p99_ms']:9.1f}")
+    for erreur in resultat["errors"]:
+        print(f"ERREUR : {erreur}")
+
+
+# Compare deux fichiers de résultats : p95 de chaque mesure pour les scénarios communs.
+def comparer(ancien, nouveau):
+    charger = lambda chemin: json.load(open(chemin, encoding="utf-8"))
+    a, b = charger(ancien), charger(nouveau)
+    print(f"{a['version']} -> {b['version']}")
+    cle = lambda s: (s["backend"], s["history"], s["sessions"])
+    precedents = {cle(s): s for s in a["scenarios"]}
+    for s in b["scenarios"]:
+        p = precedents.get(cle(s))
+        if p is None:
+            continue
+        print(f"\n== {s['backend']} / {s['history']:,} votes / {s['sessions']} sessions")
+        print(f"{'mesure':20} {'p95 avant':>10} {'p95 après':>10} {'écart':>8}")
+        for nom, lat in s["latency"].items():
+            avant = p["latency"].get(nom, {}).get("p95_ms")
+            if avant:
+                print(f"{nom:20} {avant:10.1f} {lat['p95_ms']:10.1f} {(lat['p95_ms'] / avant - 1) * 100:+7.0f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sans navigateur de app_3.py")
+    parser.add_argument("--sessions", type=int, default=4, help="sessions simultanées")
+    parser.add_argument("--history", type=int, nargs="+", default=[1_000, 100_000], help="tailles d'historique de votes (1000 à 10000000)")
+    parser.add_argument("--rounds", type=int, default=3, help="parcours de toutes les pages par session")
+    parser.add_argument("--backend", choices=["csv", "sqlite"], default="csv")
+    parser.add_argument("--output", help="fichier JSON de résultats (par défaut dans benchmarks/results/)")
+    parser.add_argument("--compare", nargs=2, metavar=("ANCIEN", "NOUVEAU"), help="comparer deux fichiers de résultats")
+    args = parser.parse_args()
+
+    if args.compare:
+        comparer(*args.compare)
+        return
+
+    resultats = {
+        "version": version(),
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "scenarios": [],
+    }
+    for historique in args.history:
+        with ProcessPoolExecutor(max_workers=1) as pool:                # un processus neuf par scénario
+            resultat = pool.submit(scenario, args.backend, historique, args.sessions, args.rounds).result()
+        afficher(resultat)
+        resultats["scenarios"].append(resultat)
+
+    sortie = args.output or os.path.join(RESULTATS, f"{datetime.now():%Y%m%d-%H%M%S}-{resultats['version']}.json")
+    os.makedirs(os.path.dirname(sortie), exist_ok=True)
+    with open(sortie, "w", encoding="utf-8") as f:
+        json.dump(resultats, f, indent=2)
+    print(f"\nRésultats enregistrés dans {sortie}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# --------------------
+# BENCHMARK : IMAGES ORIGINALES / IMAGES RÉDUITES
+# --------------------
+# Compare, pour les pages "Album" (12 images en grille) et "Personnages" (une image en pleine largeur),
+# le poids envoyé au navigateur et le temps de rendu de st.image avec les images originales et avec les versions réduites.
+#
+# Exemple : python benchmarks/bench_images.py --runs 20
+
+import argparse
+import glob
+import io
+import os
+import statistics
+import sys
+import time
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.chdir(RACINE)                                                    # les chemins d'images sont relatifs au dossier de l'application
+sys.path.insert(0, RACINE)
+
+from streamlit.testing.v1 import AppTest
+
+import images
+
+# Script minimal qui affiche une liste d'images comme la page "Album" (3 colonnes) :
+SCRIPT = """
+import streamlit as st
+chemins = {chemins!r}
+colonnes = st.columns(3)
+for i, chemin in enumerate(chemins):
+    with colonnes[i % 3]:
+        st.image(chemin, use_container_width=True)
+"""
+
+
+# Poids des images réellement envoyées par st.image (st.image ré-encode les images trop larges ou d'un autre format) :
+def octets_envoyes(chemins):
+    from PIL import Image
+    total = 0
+    for chemin in chemins:
+        with Image.open(chemin) as image:
+            if image.format in ("JPEG", "PNG") and image.width <= 1460:     # renvoyée telle quelle par Streamlit
+                total += os.path.getsize(chemin)
+            else:                                                           # redimensionnée / convertie en JPEG par Streamlit à chaque rerun
+                image = image.convert("RGB")
+                if image.width > 1460:
+                    image = image.resize((1460, int(image.height * 1460 / image.width)))
+                tampon = io.BytesIO()
+                image.save(tampon, format="JPEG", quality=90)
+                total += len(tampon.getbuffer())
+    return total
+
+
+def temps_rendu(chemins, runs):
+    at = AppTest.from_string(SCRIPT.format(chemins=chemins), default_timeout=60)
+    at.run()                                                                # premier passage hors mesure (imports, caches)
+    mesures = []
+    for _ in range(runs):
+        debut = time.perf_counter()
+        at.run()
+        mesures.append(time.perf_counter() - debut)
+    return statistics.median(mesures)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark des images de l'Album et des Personnages")
+    parser.add_argument("--runs", type=int, default=10, help="nombre de reruns mesurés par cas")
+    args = parser.parse_args()
+
+    originaux = sorted(p for p in glob.glob("Images/*.jpg"))
+
+    debut = time.perf_counter()
+    for chemin in originaux:                                                # génération (ou réutilisation) du cache
+        images.image_for(chemin, images.GRID_WIDTH)
+        images.image_for(chemin, images.FULL_WIDTH)
+    print(f"préparation du cache : {time.perf_counter() - debut:.2f} s\n")
+
+    cas = {
+        "Album (12 images)": (originaux, images.GRID_WIDTH),
+        "Personnages (1 image, moyenne)": (originaux, images.FULL_WIDTH),
+    }
+    print(f"{'page':32} {'version':10} {'Ko envoyés':>11} {'rendu (ms)':>11}")
+    for page, (chemins, largeur) in cas.items():
+        par_image = page.startswith("Personnages")
+        versions = {
+            "originale": chemins,
+            "jpeg": [images.image_for(c, largeur) for c in chemins],
+        }
+        for version, liste in versions.items():
+            octets = octets_envoyes(liste) / (len(liste) if par_image else 1)
+            rendu = temps_rendu(liste, args.runs) / (len(liste) if par_image else 1)
+            print(f"{page:32} {version:10} {octets / 1024:11.0f} {rendu * 1000:11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# --------------------
+# TEST DE CHARGE : ENREGISTREMENT DES VOTES
+# --------------------
+# Simule N sessions qui votent en même temps via add_vote() (éventuellement dans plusieurs processus, comme plusieurs
+# serveurs Streamlit sur la même machine) et affiche le débit soutenu (votes/seconde) et la latence p50 / p99.
+#
+# Exemple : python benchmarks/load_test_votes.py --sessions 50 --votes 200 --processes 2
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PERSONNAGES = ["Obiwan Kenobi", "Dark Vador", "Luke Skywalker", "Yoda", "R2D2", "C3PO"]
+CAMPS = ["Côté Obscur", "Côté Lumineux"]
+
+
+# Un processus : lance `sessions` threads qui votent chacun `votes` fois, et renvoie toutes les latences mesurées.
+def _processus(dossier, sessions, votes):
+    os.chdir(dossier)                                               # votes.csv est relatif au dossier courant
+    sys.path.insert(0, RACINE)
+    from votes import add_vote
+
+    latences = []
+    verrou = threading.Lock()
+    depart = threading.Barrier(sessions)
+
+    def session(numero):
+        mesures = []
+        depart.wait()                                               # toutes les sessions commencent en même temps
+        for i in range(votes):
+            debut = time.perf_counter()
+            add_vote(PERSONNAGES[(numero + i) % len(PERSONNAGES)], CAMPS[i % 2])
+            mesures.append(time.perf_counter() - debut)
+        with verrou:
+            latences.extend(mesures)
+
+    threads = [threading.Thread(target=session, args=(n,)) for n in range(sessions)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return latences
+
+
+def percentile(valeurs, p):
+    valeurs = sorted(valeurs)
+    return valeurs[min(len(valeurs) - 1, int(len(valeurs) * p / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Test de charge de add_vote()")
+    parser.add_argument("--sessions", type=int, default=50, help="sessions simultanées par processus")
+    parser.add_argument("--votes", type=int, default=200, help="votes par session")
+    parser.add_argument("--processes", type=int, default=1, help="nombre de processus serveurs simulés")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as dossier:
+        debut = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=args.processes) as pool:
+            resultats = list(pool.map(_processus, [dossier] * args.processes,
+                                      [args.sessions] * args.processes, [args.votes] * args.processes))
+        duree = time.perf_counter() - debut
+        latences = [l for r in resultats for l in r]
+
+        # Vérification : chaque vote correspond à exactement une ligne complète et bien formée.
+        with open(os.path.join(dossier, "votes.csv"), encoding="utf-8") as f:
+            lignes = f.read().splitlines()
+        attendu = args.sessions * args.votes * args.processes
+        abimees = [l for l in lignes[1:] if l.count(",") != 3]
+        assert lignes[0] == "timestamp,personnage,camp,username", lignes[0]
+        assert len(lignes) - 1 == attendu and not abimees, (len(lignes) - 1, attendu, abimees[:3])
+
+    print(f"{attendu} votes en {duree:.2f} s ({args.processes} processus x {args.sessions} sessions)")
+    print(f"débit     : {attendu / duree:,.0f} votes/s")
+    print(f"latence   : p50 {statistics.median(latences) * 1000:.2f} ms, p99 {percentile(latences, 99) * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
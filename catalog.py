@@ -0,0 +1,64 @@
+# --------------------
+# CATALOGUE DES PERSONNAGES
+# --------------------
+# La liste des personnages (nom, image, texte de présentation) est lue depuis personnages.json une seule fois
+# par processus, et relue seulement si le fichier change. Elle alimente la barre latérale, la page "Personnages",
+# la page "Votes" et la grille de l'"Album" : pour ajouter un personnage, il suffit de l'ajouter au fichier.
+
+import json
+import os
+import threading
+from typing import NamedTuple
+
+CATALOG_FILE = os.environ.get("CATALOG_FILE", "personnages.json")
+
+
+class Character(NamedTuple):
+    nom: str
+    image: str                                                      # chemin de l'image originale
+    texte: str
+
+
+class Catalog:
+    def __init__(self, personnages):
+        self.characters = tuple(personnages)                        # dans l'ordre du fichier
+        self.names = tuple(p.nom for p in self.characters)          # options toutes prêtes pour les listes déroulantes
+        self._index = {p.nom: i for i, p in enumerate(self.characters)}
+
+    def __len__(self):
+        return len(self.characters)
+
+    def get(self, nom):
+        return self.characters[self._index[nom]]
+
+    # Nombre de pages de `taille` personnages (au moins une, même si le catalogue est vide) :
+    def page_count(self, taille):
+        return max(1, -(-len(self.characters) // taille))
+
+    # Personnages de la page `numero` (à partir de 1) : seuls ceux-là sont affichés, et donc leurs images chargées.
+    def page(self, numero, taille):
+        debut = (numero - 1) * taille
+        return self.characters[debut:debut + taille]
+
+
+def _charger(path):
+    with open(path, encoding="utf-8") as f:
+        return Catalog(Character(p["nom"], p["image"], p["texte"]) for p in json.load(f))
+
+
+_verrou = threading.Lock()
+_signature = None                                                   # (mtime, taille) du fichier au dernier chargement
+_catalogue = None
+
+
+# Catalogue partagé par toutes les sessions, rechargé seulement si le fichier a été modifié :
+def get_catalog():
+    global _signature, _catalogue
+    stat = os.stat(CATALOG_FILE)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    if signature != _signature:
+        with _verrou:
+            if signature != _signature:
+                _catalogue = _charger(CATALOG_FILE)
+                _signature = signature
+    return _catalogue
@@ -0,0 +1,97 @@
+# --------------------
+# IMAGES REDIMENSIONNÉES (MINIATURES)
+# --------------------
+# Les images originales de Images/ sont lourdes (jusqu'à 600 Ko) alors qu'elles sont affichées en petit.
+# On génère une seule fois des versions JPEG réduites par palier de largeur, rangées dans un cache
+# sur disque et identifiées par l'empreinte du fichier source : si l'image source change, une nouvelle version est créée.
+# Pas de variante WebP : st.image réencode en JPEG toute image qui n'est ni JPEG ni PNG, elle ne serait jamais servie telle quelle.
+
+import glob
+import hashlib
+import os
+import threading
+
+try:
+    from PIL import Image
+except ImportError:                                                 # sans Pillow, on affiche simplement les images originales
+    Image = None
+
+IMAGE_CACHE_DIR = ".image_cache"                                    # dossier des images redimensionnées (regénérable à tout moment)
+WIDTHS = (320, 640, 960, 1280)                                      # paliers de largeur (en pixels) des versions réduites
+JPEG_QUALITY = 82
+
+# Largeurs à demander selon la mise en page (écrans haute densité compris) :
+GRID_WIDTH = 640                                                    # une image dans une grille de 3 colonnes (page "Album")
+FULL_WIDTH = 1280                                                   # une image sur toute la largeur (page "Personnages")
+
+_empreintes = {}                                                    # {chemin: ((mtime, taille), empreinte)} pour ne pas relire les fichiers à chaque rerun
+_resolus = {}                                                       # {(chemin, empreinte, palier): image à afficher}
+_verrou = threading.Lock()
+
+
+# Plus petit palier au moins aussi large que la largeur demandée :
+def bucket(width):
+    for palier in WIDTHS:
+        if palier >= width:
+            return palier
+    return WIDTHS[-1]
+
+
+# Empreinte du contenu du fichier source, recalculée seulement si sa date de modification ou sa taille change :
+def _empreinte(path):
+    stat = os.stat(path)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    connue = _empreintes.get(path)
+    if connue is not None and connue[0] == signature:
+        return connue[1]
+    with open(path, "rb") as f:
+        empreinte = hashlib.sha1(f.read()).hexdigest()[:16]
+    _empreintes[path] = (signature, empreinte)
+    return empreinte
+
+
+# Renvoie le chemin de l'image à afficher pour une largeur donnée.
+# L'image originale est renvoyée si elle est déjà assez petite, si Pillow n'est pas installé ou si elle ne peut pas être lue.
+def image_for(path, width):
+    if Image is None:
+        return path
+    palier = bucket(width)
+    try:
+        with _verrou:
+            empreinte = _empreinte(path)
+            cle = (path, empreinte, palier)
+            chemin = _resolus.get(cle)
+            if chemin is None or not os.path.exists(chemin):        # première demande, ou cache vidé entre-temps
+                nom = os.path.splitext(os.path.basename(path))[0]
+                cible = _cible(nom, empreinte, palier)
+                if not os.path.exists(cible):
+                    _generer(path, nom, empreinte, palier)
+                chemin = _resolus[cle] = cible if os.path.exists(cible) else path
+            return chemin
+    except OSError:
+        return path
+
+
+# Crée la version JPEG d'une image pour un palier (rien si l'original est déjà plus petit que le palier, ou plus léger) :
+def _generer(path, nom, empreinte, palier):
+    with Image.open(path) as source:
+        if source.width <= palier:
+            return
+        image = source.convert("RGB")
+    image.thumbnail((palier, palier * 10), Image.LANCZOS)           # on ne contraint que la largeur, les proportions sont conservées
+
+    os.makedirs(IMAGE_CACHE_DIR, exist_ok=True)
+    cible = _cible(nom, empreinte, palier)
+    temporaire = f"{cible}.{os.getpid()}.tmp"
+    image.save(temporaire, format="JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+    if os.path.getsize(temporaire) >= os.path.getsize(path):        # la version réduite n'est pas plus légère : on garde l'original
+        os.remove(temporaire)
+        return
+    os.replace(temporaire, cible)                                   # remplacement atomique : jamais de fichier à moitié écrit dans le cache
+    for ancienne in glob.glob(os.path.join(IMAGE_CACHE_DIR, f"{glob.escape(nom)}-*-{palier}.jpg")):
+        if ancienne != cible:                                       # versions d'une ancienne image source
+            os.remove(ancienne)
+
+
+def _cible(nom, empreinte, palier):
+    return os.path.join(IMAGE_CACHE_DIR, f"{nom}-{empreinte}-{palier}.jpg")
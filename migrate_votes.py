@@ -0,0 +1,38 @@
+# --------------------
+# MIGRATION DES VOTES CSV -> SQLITE
+# --------------------
+# Importe un fichier votes.csv existant dans une base SQLite, à utiliser avec VOTES_BACKEND=sqlite.
+# Les votes déjà compactés dans les archives de l'époque en cours (votes_archive/) sont importés d'abord.
+#
+# Exemple : python migrate_votes.py votes.csv votes.db
+
+import argparse
+import os
+import sys
+
+from vote_archive import VoteArchive, archive_dir_for
+from vote_storage import SqliteVoteStorage, import_csv, import_frame
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Importe votes.csv dans une base SQLite")
+    parser.add_argument("csv", nargs="?", default="votes.csv", help="fichier CSV à importer")
+    parser.add_argument("db", nargs="?", default="votes.db", help="base SQLite de destination")
+    parser.add_argument("--force", action="store_true", help="importer même si la base contient déjà des votes")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.csv):
+        sys.exit(f"Fichier introuvable : {args.csv}")
+    storage = SqliteVoteStorage(args.db)
+    deja = storage.stats().total
+    if deja and not args.force:                                     # évite d'importer deux fois les mêmes votes
+        sys.exit(f"{args.db} contient déjà {deja} votes (utiliser --force pour importer quand même)")
+
+    archive = VoteArchive(archive_dir_for(args.csv))
+    importes = sum(import_frame(morceau, storage) for morceau in archive.frames(archive.epoch()))
+    importes += import_csv(args.csv, storage)
+    print(f"{importes} votes importés dans {args.db}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+# --------------------
+# MESURE DU COÛT DES RERUNS
+# --------------------
+# Streamlit ré-exécute tout le script à chaque interaction : ce module chronomètre chaque partie du script
+# (authentification, pages, appels au stockage des votes…), compte les reruns de chaque session et garde,
+# pour chaque mesure, un histogramme des durées. Les résultats sont affichés sur la page "Diagnostics"
+# (administrateurs) et écrits régulièrement dans metrics/metrics.json et metrics/metrics.prom (format Prometheus).
+
+import functools
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+METRICS_DIR = os.environ.get("METRICS_DIR", "metrics")            # dossier des exports JSON / Prometheus
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)    # bornes des histogrammes (secondes)
+MAX_SESSIONS = 1000                                                 # nombre de sessions suivies (les plus anciennes sont oubliées)
+
+
+class Histogram:
+    __slots__ = ("count", "total", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)                     # la dernière case compte les durées au-delà de la plus grande borne
+
+    def observe(self, duree):
+        self.count += 1
+        self.total += duree
+        self.max = max(self.max, duree)
+        for i, borne in enumerate(BUCKETS):
+            if duree <= borne:
+                self.buckets[i] += 1
+                return
+        self.buckets[-1] += 1
+
+    # Estimation d'un percentile à partir des cases de l'histogramme (borne haute de la case concernée) :
+    def percentile(self, p):
+        if not self.count:
+            return 0.0
+        rang = self.count * p / 100
+        cumul = 0
+        for borne, n in zip(BUCKETS, self.buckets):
+            cumul += n
+            if cumul >= rang:
+                return min(borne, self.max)
+        return self.max
+
+
+class Profiler:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._histogrammes = {}                                 # {nom de la mesure: Histogram}
+            self._sessions = OrderedDict()                          # {id de session: nombre de reruns}, de la moins à la plus récemment active
+            self._debut = time.time()
+            self._dernier_export = 0.0
+
+    def observe(self, nom, duree):
+        with self._lock:
+            histogramme = self._histogrammes.get(nom)
+            if histogramme is None:
+                histogramme = self._histogrammes[nom] = Histogram()
+            histogramme.observe(duree)
+
+    # Chronomètre un bloc : with profiler.section("page.Votes"): ...
+    # La durée est enregistrée même si le bloc est interrompu (st.rerun(), st.stop(), erreur).
+    @contextmanager
+    def section(self, nom):
+        debut = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(nom, time.perf_counter() - debut)
+
+    # Chronomètre chaque appel d'une fonction : @profiler.timed("storage.add_vote")
+    def timed(self, nom):
+        def decorateur(fonction):
+            @functools.wraps(fonction)
+            def enveloppe(*args, **kwargs):
+                with self.section(nom):
+                    return fonction(*args, **kwargs)
+            return enveloppe
+        return decorateur
+
+    # Compte un rerun pour une session et renvoie le compteur mis à jour :
+    def count_rerun(self, session_id):
+        with self._lock:
+            reruns = self._sessions.pop(session_id, 0) + 1
+            self._sessions[session_id] = reruns
+            if len(self._sessions) > MAX_SESSIONS:
+                self._sessions.popitem(last=False)
+            return reruns
+
+    # Photo de toutes les mesures, au format JSON :
+    def snapshot(self):
+        with self._lock:
+            return {
+                "since": self._debut,
+                "generated_at": time.time(),
+                "sessions": len(self._sessions),
+                "reruns_per_session": dict(self._sessions),
+                "timings": {
+                    nom: {
+                        "count": h.count,
+                        "mean": h.total / h.count if h.count else 0.0,
+                        "p50": h.percentile(50),
+                        "p95": h.percentile(95),
+                        "p99": h.percentile(99),
+                        "max": h.max,
+                        "buckets": dict(zip([*map(str, BUCKETS), "+Inf"], h.buckets)),
+                    }
+                    for nom, h in sorted(self._histogrammes.items())
+                },
+            }
+
+    # Mesures au format texte de Prometheus (histogramme "streamlit_app_section_seconds" avec un label par mesure) :
+    def to_prometheus(self):
+        lignes = [
+            "# HELP streamlit_app_section_seconds Durée des parties du script Streamlit.",
+            "# TYPE streamlit_app_section_seconds histogram",
+        ]
+        with self._lock:
+            for nom, h in sorted(self._histogrammes.items()):
+                cumul = 0
+                for borne, n in zip([*map(str, BUCKETS), "+Inf"], h.buckets):
+                    cumul += n
+                    lignes.append(f'streamlit_app_section_seconds_bucket{{section="{nom}",le="{borne}"}} {cumul}')
+                lignes.append(f'streamlit_app_section_seconds_sum{{section="{nom}"}} {h.total}')
+                lignes.append(f'streamlit_app_section_seconds_count{{section="{nom}"}} {h.count}')
+            lignes += [
+                "# HELP streamlit_app_sessions Sessions suivies.",
+                "# TYPE streamlit_app_sessions gauge",
+                f"streamlit_app_sessions {len(self._sessions)}",
+                "# HELP streamlit_app_reruns_total Reruns des sessions suivies.",
+                "# TYPE streamlit_app_reruns_total counter",
+                f"streamlit_app_reruns_total {sum(self._sessions.values())}",
+            ]
+        return "\n".join(lignes) + "\n"
+
+    # Écrit metrics.json et metrics.prom (remplacement atomique, pour ne jamais exposer un fichier à moitié écrit) :
+    def dump(self, dossier=METRICS_DIR):
+        os.makedirs(dossier, exist_ok=True)
+        for nom, contenu in (("metrics.json", json.dumps(self.snapshot(), indent=2)), ("metrics.prom", self.to_prometheus())):
+            chemin = os.path.join(dossier, nom)
+            temporaire = f"{chemin}.{threading.get_ident()}.tmp"           # un fichier temporaire par thread : deux exports simultanés ne se mélangent pas
+            with open(temporaire, "w", encoding="utf-8") as f:
+                f.write(contenu)
+            os.replace(temporaire, chemin)
+
+    # Exporte les mesures au plus une fois toutes les `interval` secondes (appelé à la fin de chaque rerun) :
+    def autosave(self, interval=10.0):
+        maintenant = time.monotonic()
+        with self._lock:
+            if maintenant - self._dernier_export < interval:
+                return
+            self._dernier_export = maintenant
+        self.dump()
+
+
+# Mesures partagées par toutes les sessions : ce module n'est importé qu'une fois par processus.
+profiler = Profiler()
@@ -0,0 +1,15 @@
+from user_store import SessionAccounts
+
+
+def test_session_accounts_keep_login_state_out_of_the_shared_accounts():
+    comptes = {"luke": {"name": "Luke", "password": "hash", "email": "luke@rebelles.org", "role": "utilisateur"}}
+    session, autre = SessionAccounts(comptes), SessionAccounts(comptes)
+
+    session["luke"]["logged_in"] = True
+    session["luke"]["failed_login_attempts"] = 0
+
+    assert session["luke"]["logged_in"] and session["luke"]["email"] == "luke@rebelles.org"
+    assert "logged_in" not in autre["luke"]
+    assert set(comptes["luke"]) == {"name", "password", "email", "role"}
+    assert "luke" in session and "leia" not in session
+    assert list(session) == ["luke"] and len(session) == 1
@@ -0,0 +1,189 @@
+import multiprocessing
+import os
+import sqlite3
+import threading
+
+from vote_archive import VoteArchive, archive_dir_for
+from vote_storage import VOTES_COLUMNS, CsvVoteStorage, SqliteVoteStorage
+
+
+def _stockage(tmp_path, **options):
+    return CsvVoteStorage(str(tmp_path / "votes.csv"), **{"compact_bytes": None, **options})
+
+
+def _voter(stockage, votes, personnage="Yoda"):
+    for i in range(votes):
+        stockage.add(personnage, "Côté Obscur" if i % 2 else "Côté Lumineux", f"u{i}")
+
+
+def test_compaction_keeps_counts_and_empties_the_log(tmp_path):
+    stockage = _stockage(tmp_path)
+    _voter(stockage, 10)
+    avant = stockage.stats()
+    heures = stockage.rollup("heure")
+
+    stockage.compact()
+
+    with open(stockage.path, encoding="utf-8") as f:
+        assert f.read() == ",".join(VOTES_COLUMNS) + "\n"
+    assert stockage.stats() == avant
+    assert stockage.rollup("heure").equals(heures)
+    assert len(stockage.load()) == 10
+    archive = VoteArchive(archive_dir_for(stockage.path))
+    assert archive.pending(1) == []
+    assert archive.load_snapshot(1)["total"] == 10
+
+
+def test_cold_start_loads_the_snapshot_then_the_tail_of_the_log(tmp_path):
+    stockage = _stockage(tmp_path)
+    _voter(stockage, 10)
+    stockage.compact()
+    _voter(stockage, 3, "Leia")
+
+    nouveau = _stockage(tmp_path)
+    assert nouveau.stats() == stockage.stats()
+    assert nouveau.stats().total == 13
+    assert nouveau.rollup("minute").equals(stockage.rollup("minute"))
+    assert len(nouveau.load()) == 13
+
+
+def test_segment_of_an_interrupted_compaction_is_counted_once(tmp_path):
+    stockage = _stockage(tmp_path)
+    _voter(stockage, 4)
+    stockage.compact()
+    archive = VoteArchive(archive_dir_for(stockage.path))
+    segment = archive.new_segment(1)                                # renommé, mais ni compté dans l'instantané ni archivé
+    with open(segment, "w", encoding="utf-8") as f:
+        f.write(",".join(VOTES_COLUMNS) + "\n2026-10-18T08:00:00,Han,Côté Lumineux,han\n")
+
+    assert _stockage(tmp_path).stats().total == 5
+    stockage = _stockage(tmp_path)
+    _voter(stockage, 1)
+    stockage.compact()
+    assert not os.path.exists(segment)
+    assert _stockage(tmp_path).stats().total == 6
+    assert len(_stockage(tmp_path).load()) == 6
+
+
+def test_reload_during_a_compaction_by_another_instance_counts_every_vote(tmp_path):
+    a = _stockage(tmp_path)
+    _voter(a, 5)
+    a.compact()
+    _voter(a, 3, "Leia")
+    b = _stockage(tmp_path)
+
+    # a renomme son journal, puis attend que b ait lu l'ancien instantané pour enregistrer le nouveau et archiver le segment,
+    # avant que b ne liste les segments en attente :
+    pivote, reprendre = threading.Event(), threading.Event()
+    save_snapshot, pending = a._archive.save_snapshot, b._archive.pending
+
+    def save_snapshot_apres_b(*args):
+        pivote.set()
+        reprendre.wait(10)
+        save_snapshot(*args)
+
+    def pending_apres_a(epoch):
+        reprendre.set()
+        compaction.join(10)
+        return pending(epoch)
+
+    a._archive.save_snapshot = save_snapshot_apres_b
+    compaction = threading.Thread(target=a.compact)
+    compaction.start()
+    assert pivote.wait(10)
+    b._archive.pending = pending_apres_a
+    assert b.stats().total == 8
+    b._archive.pending = pending
+    b.compact()
+    assert _stockage(tmp_path).stats().total == 8
+
+
+def test_reset_opens_a_new_epoch_and_keeps_the_archives(tmp_path):
+    stockage = _stockage(tmp_path)
+    _voter(stockage, 5)
+    stockage.reset()
+
+    assert stockage.stats().total == 0
+    assert len(stockage.load()) == 0
+    archive = VoteArchive(archive_dir_for(stockage.path))
+    assert archive.epoch() == 2
+    assert sum(len(morceau) for morceau in archive.frames(1)) == 5
+    _voter(stockage, 2)
+    assert _stockage(tmp_path).stats().total == 2
+
+
+def test_reset_is_seen_by_other_instances_even_right_after_a_compaction(tmp_path):
+    a = _stockage(tmp_path)
+    b = _stockage(tmp_path)
+    _voter(a, 5)
+    assert b.stats().total == 5
+
+    a.compact()                                                     # le journal ne contient plus que l'en-tête
+    assert b.stats().total == 5                                     # b a déjà relu le nouveau journal
+    a.reset()
+    assert a.stats().total == 0
+    assert b.stats().total == 0
+    b.add("Luke", "Côté Lumineux", "luke")
+    assert a.stats().total == b.stats().total == 1
+
+
+def test_compaction_by_an_instance_that_missed_a_reset_writes_to_the_new_epoch(tmp_path):
+    a = _stockage(tmp_path)
+    b = _stockage(tmp_path)
+    _voter(a, 5)
+    assert b.stats().total == 5
+    a.reset()
+    _voter(a, 3)
+
+    b.compact()                                                     # b compte encore l'époque 1
+    assert a.stats().total == b.stats().total == _stockage(tmp_path).stats().total == 3
+    archive = VoteArchive(archive_dir_for(a.path))
+    assert sum(len(morceau) for morceau in archive.frames(1)) == 5
+    assert sum(len(morceau) for morceau in archive.frames(2)) == 3
+
+
+def test_sqlite_reset_keeps_the_votes_of_earlier_epochs(tmp_path):
+    stockage = SqliteVoteStorage(str(tmp_path / "votes.db"))
+    _voter(stockage, 5)
+    stockage.reset()
+    stockage.add("Luke", "Côté Lumineux", "luke")
+
+    assert stockage.stats().total == 1
+    assert len(stockage.load()) == 1
+    conn = sqlite3.connect(stockage.path)
+    assert conn.execute("SELECT epoch, COUNT(*) FROM votes GROUP BY epoch").fetchall() == [(1, 5), (2, 1)]
+
+
+# Un processus serveur qui vote depuis plusieurs sessions et déclenche des compactions en arrière-plan :
+def _voter_en_processus(chemin, numero):
+    stockage = CsvVoteStorage(chemin, compact_bytes=4096)
+
+    def session(n):
+        for i in range(200):
+            stockage.add(f"P{i % 7}", "Côté Obscur", f"p{numero}-s{n}")
+            if i % 20 == 0:
+                stockage.stats()
+
+    threads = [threading.Thread(target=session, args=(n,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    stockage.compact()
+
+
+def test_compactions_by_several_processes_lose_no_votes(tmp_path):
+    chemin = str(tmp_path / "votes.csv")
+    contexte = multiprocessing.get_context("spawn")
+    processus = [contexte.Process(target=_voter_en_processus, args=(chemin, n)) for n in range(2)]
+    for p in processus:
+        p.start()
+    for p in processus:
+        p.join(120)
+        assert p.exitcode == 0
+
+    stockage = CsvVoteStorage(chemin, compact_bytes=None)
+    assert stockage.stats().total == 2 * 4 * 200
+    assert len(stockage.load()) == 2 * 4 * 200
+    assert sum(ligne[-1] for ligne in stockage._rollups.rows("minute")) == 2 * 4 * 200
+    assert len(VoteArchive(archive_dir_for(chemin)).pending(1)) == 0
@@ -0,0 +1,98 @@
+import pytest
+
+from vote_policy import BoundedTTLCache, VotePolicy
+
+
+def test_cache_forgets_expired_entries():
+    cache = BoundedTTLCache(max_size=10, ttl=5)
+    cache.set("a", 1, maintenant=0)
+    assert cache.get("a", maintenant=5) == 1
+    assert cache.get("a", maintenant=5.1) is None
+    assert len(cache) == 0
+
+
+def test_cache_evicts_least_recently_updated_when_full():
+    cache = BoundedTTLCache(max_size=2, ttl=100)
+    cache.set("a", 1, maintenant=0)
+    cache.set("b", 2, maintenant=1)
+    cache.set("a", 3, maintenant=2)                                 # "a" redevient la plus récente
+    cache.set("c", 4, maintenant=3)
+    assert len(cache) == 2
+    assert cache.get("b", maintenant=3) is None
+    assert cache.get("a", maintenant=3) == 3
+    assert cache.get("c", maintenant=3) == 4
+
+
+def test_one_vote_per_window():
+    policy = VotePolicy(window=5, burst=10, refill=60)
+    assert policy.check("luke", maintenant=0).allowed
+    refus = policy.check("luke", maintenant=2)
+    assert not refus.allowed
+    assert refus.retry_after == 3
+    assert policy.check("leia", maintenant=2).allowed               # les autres utilisateurs ne sont pas concernés
+    assert policy.check("luke", maintenant=5).allowed
+
+
+def test_token_bucket_limits_bursts_then_refills():
+    policy = VotePolicy(window=0, burst=3, refill=10)
+    assert [policy.check("han", maintenant=t).allowed for t in (0, 1, 2, 3)] == [True, True, True, False]
+    refus = policy.check("han", maintenant=3)
+    assert 0 < refus.retry_after <= 10
+    assert policy.check("han", maintenant=3 + refus.retry_after).allowed
+    assert not policy.check("han", maintenant=3 + refus.retry_after).allowed
+
+
+def test_idempotency_key_counts_a_double_submit_once():
+    policy = VotePolicy(window=0, burst=10, refill=60)
+    assert policy.check("yoda", idempotency_key="k1", maintenant=0).allowed
+    assert not policy.check("yoda", idempotency_key="k1", maintenant=0.1).allowed
+    assert policy.check("yoda", idempotency_key="k2", maintenant=0.2).allowed
+
+
+def test_refused_vote_does_not_consume_the_idempotency_key():
+    policy = VotePolicy(window=5, burst=10, refill=60)
+    assert policy.check("obiwan", idempotency_key="k1", maintenant=0).allowed
+    assert not policy.check("obiwan", idempotency_key="k2", maintenant=1).allowed
+    assert policy.check("obiwan", idempotency_key="k2", maintenant=6).allowed
+
+
+def test_index_of_voters_stays_bounded():
+    policy = VotePolicy(window=5, burst=10, refill=60, max_users=100)
+    for n in range(1000):
+        policy.check(f"votant{n}", idempotency_key=f"cle{n}", maintenant=n / 1000)
+    assert len(policy._votants) == 100
+    assert len(policy._cles) == 100
+
+
+def test_released_vote_gives_back_the_token_and_the_idempotency_key():
+    policy = VotePolicy(window=5, burst=1, refill=60)
+    assert policy.check("leia", idempotency_key="k1", maintenant=0).allowed
+    policy.release("leia", idempotency_key="k1", maintenant=0.5)
+    assert policy.check("leia", idempotency_key="k1", maintenant=1).allowed
+    assert not policy.check("leia", idempotency_key="k2", maintenant=2).allowed
+
+
+def test_refill_zero_means_no_rate_limit():
+    policy = VotePolicy(window=0, burst=1, refill=0)
+    assert all(policy.check("chewie", maintenant=t).allowed for t in range(20))
+
+
+class _Stockage:
+    def __init__(self, erreur=None):
+        self.erreur = erreur
+
+    def add(self, personnage, camp, username=None):
+        if self.erreur is not None:
+            raise self.erreur
+
+
+def test_vote_that_fails_to_be_written_does_not_count(monkeypatch):
+    import votes
+
+    monkeypatch.setattr(votes, "_policy", VotePolicy(window=5, burst=10, refill=60))
+    monkeypatch.setattr(votes, "_storage", _Stockage(OSError(28, "No space left on device")))
+    with pytest.raises(OSError):
+        votes.add_vote("Yoda", "Côté Lumineux", "lando", "k1")
+
+    monkeypatch.setattr(votes, "_storage", _Stockage())
+    assert votes.add_vote("Yoda", "Côté Lumineux", "lando", "k1").allowed
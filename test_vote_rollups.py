@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta
+
+from vote_rollups import PURGE_EVERY, RETENTION, VoteRollups, window_start
+from vote_storage import VOTES_COLUMNS, CsvVoteStorage, SqliteVoteStorage
+
+
+def _minute(instant):
+    return instant.isoformat(timespec="seconds")[:16]
+
+
+def _debuts(rollups, granularite):
+    return [debut for debut, _, _, _ in rollups.rows(granularite)]
+
+
+def test_window_start_is_truncated_to_the_granularity():
+    maintenant = datetime(2026, 10, 18, 12, 34, 56)
+    assert window_start("minute", timedelta(minutes=15), maintenant) == "2026-10-18T12:19"
+    assert window_start("heure", timedelta(hours=2), maintenant) == "2026-10-18T10"
+    assert window_start("jour", timedelta(days=7), maintenant) == "2026-10-11"
+
+
+def test_bucket_at_the_retention_edge_is_kept_and_the_one_before_is_dropped():
+    dernier = datetime(2026, 10, 18, 12, 0)
+    limite = dernier - RETENTION["minute"]
+    rollups = VoteRollups()
+    rollups.add_counts({
+        (_minute(limite - timedelta(minutes=1)), "Yoda", "Côté Lumineux"): 1,
+        (_minute(limite), "Yoda", "Côté Lumineux"): 2,
+        (_minute(dernier), "Yoda", "Côté Lumineux"): 3,
+    })
+
+    assert rollups.rows("minute") == [(_minute(limite), "Yoda", "Côté Lumineux", 2), (_minute(dernier), "Yoda", "Côté Lumineux", 3)]
+    assert sum(votes for _, _, _, votes in rollups.rows("heure")) == 6     # encore dans la rétention des heures et des jours
+    assert sum(votes for _, _, _, votes in rollups.rows("jour")) == 6
+
+
+def test_old_buckets_are_purged_every_purge_every_new_buckets():
+    ancien = datetime(2026, 10, 1, 8, 0)
+    rollups = VoteRollups()
+    rollups.add("2026-10-01T08:00:00", "Vador", "Côté Obscur")
+    recent = ancien + RETENTION["minute"] + timedelta(days=1)
+
+    for i in range(PURGE_EVERY - 2):                                # la tranche ancienne compte parmi les nouvelles tranches
+        rollups.add((recent + timedelta(minutes=i)).isoformat(), "Yoda", "Côté Lumineux")
+    assert _debuts(rollups, "minute")[0] == _minute(ancien)         # trop ancienne, mais pas encore purgée
+
+    rollups.add((recent + timedelta(minutes=PURGE_EVERY)).isoformat(), "Yoda", "Côté Lumineux")
+    debuts = _debuts(rollups, "minute")
+    assert _minute(ancien) not in debuts
+    assert len(debuts) == PURGE_EVERY - 1
+    assert _debuts(rollups, "heure")[0] == "2026-10-01T08"          # les heures sont gardées 90 jours
+
+
+def test_csv_and_sqlite_rollups_return_the_same_rows(tmp_path):
+    maintenant = datetime.now().replace(microsecond=0)
+    votes = [
+        ((maintenant - timedelta(days=3)).isoformat(), "Vador", "Côté Obscur", "u1"),   # hors de la rétention des minutes
+        ((maintenant - timedelta(hours=5)).isoformat(), "Yoda", "Côté Lumineux", "u2"),
+        ((maintenant - timedelta(hours=5)).isoformat(), "Yoda", "Côté Lumineux", "u3"),
+        ((maintenant - timedelta(minutes=1)).isoformat(), "Leia", "Côté Lumineux", "u4"),
+        (maintenant.isoformat(), "Vador", "Côté Obscur", "u5"),
+    ]
+    chemin = tmp_path / "votes.csv"
+    chemin.write_text(",".join(VOTES_COLUMNS) + "\n" + "".join(",".join(vote) + "\n" for vote in votes), encoding="utf-8")
+    csv_ = CsvVoteStorage(str(chemin), compact_bytes=None)
+    sqlite = SqliteVoteStorage(str(tmp_path / "votes.db"))
+    sqlite.add_many(votes)
+
+    for granularite in ("minute", "heure", "jour"):
+        lignes_csv = sorted(csv_.rollup(granularite).itertuples(index=False, name=None))
+        lignes_sqlite = sorted(sqlite.rollup(granularite).itertuples(index=False, name=None))
+        assert lignes_csv == lignes_sqlite
+    assert len(sqlite.rollup("minute")) == 3
+    since = window_start("minute", timedelta(minutes=15), maintenant)
+    assert csv_.rollup("minute", since).equals(sqlite.rollup("minute", since))
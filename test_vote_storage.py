@@ -0,0 +1,129 @@
+import multiprocessing
+import threading
+import time
+
+import pandas as pd
+
+from vote_storage import VOTES_COLUMNS, CsvVoteStorage, SqliteVoteStorage, import_csv
+from vote_writer import VoteWriter
+
+ENTETE = ",".join(VOTES_COLUMNS)
+
+
+def _lignes(chemin):
+    with open(chemin, encoding="utf-8") as f:
+        return f.read().splitlines()
+
+
+# Un processus serveur : `sessions` threads qui votent chacun `votes` fois dans le même fichier.
+def _voter(chemin, numero, sessions, votes):
+    stockage = CsvVoteStorage(chemin, compact_bytes=None)
+
+    def session(n):
+        for i in range(votes):
+            stockage.add(f"P{i % 5}", "Côté Obscur", f"p{numero}-s{n}")
+
+    threads = [threading.Thread(target=session, args=(n,)) for n in range(sessions)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+
+def _processus(cible, *args, nombre=2):
+    contexte = multiprocessing.get_context("spawn")
+    processus = [contexte.Process(target=cible, args=(*args, numero)) for numero in range(nombre)]
+    for p in processus:
+        p.start()
+    return processus
+
+
+def _attendre(processus):
+    for p in processus:
+        p.join(60)
+        assert p.exitcode == 0
+
+
+def _voter_en_processus(chemin, sessions, votes, numero):
+    _voter(chemin, numero, sessions, votes)
+
+
+def test_votes_record_the_username(tmp_path):
+    csv_ = CsvVoteStorage(str(tmp_path / "votes.csv"), compact_bytes=None)
+    csv_.add("Yoda", "Côté Lumineux", "luke")
+    csv_.add("Yoda", "Côté Lumineux")
+    assert csv_.load()["username"].tolist() == ["luke", ""]
+
+    sqlite = SqliteVoteStorage(str(tmp_path / "votes.db"))
+    sqlite.add("Yoda", "Côté Lumineux", "luke")
+    assert sqlite.load()["username"].tolist() == ["luke"]
+
+
+def test_processes_creating_the_log_together_lose_no_votes(tmp_path):
+    chemin = str(tmp_path / "votes.csv")
+    _attendre(_processus(_voter_en_processus, chemin, 4, 50))
+    lignes = _lignes(chemin)
+    assert lignes[0] == ENTETE
+    assert lignes.count(ENTETE) == 1
+    assert len(lignes) - 1 == 2 * 4 * 50
+
+
+# Un serveur de la version précédente (3 colonnes) qui écrit encore pendant la migration de l'en-tête par un autre processus :
+def _ecrire_en_processus(chemin, votes, numero):
+    writer = VoteWriter(chemin, ["timestamp", "personnage", "camp"], max_delay=0.001)
+    for i in range(votes):
+        writer.submit(["2026-10-18T08:00:00", f"W{numero}", "Côté Obscur"])
+
+
+def test_header_migration_keeps_votes_written_by_other_processes(tmp_path):
+    chemin = str(tmp_path / "votes.csv")
+    anciens = [f"2026-02-13T12:{i % 60:02d}:00,Yoda,Côté Lumineux" for i in range(200_000)]
+    with open(chemin, "w", encoding="utf-8") as f:
+        f.write("timestamp,personnage,camp\n" + "\n".join(anciens) + "\n")
+
+    processus = _processus(_ecrire_en_processus, chemin, 1000)
+    while len(_lignes(chemin)) < 200_000 + 50:                      # la migration commence pendant que les autres écrivent
+        time.sleep(0.01)
+    CsvVoteStorage(chemin, compact_bytes=None).init()
+    _attendre(processus)
+
+    votes = pd.read_csv(chemin, dtype=str, keep_default_na=False)
+    assert list(votes.columns) == VOTES_COLUMNS
+    assert votes["personnage"].value_counts().to_dict() == {"Yoda": 200_000, "W0": 1000, "W1": 1000}
+
+
+def test_import_skips_rows_without_timestamp_character_or_camp(tmp_path):
+    source = tmp_path / "votes.csv"
+    source.write_text(
+        "timestamp,personnage,camp\n"
+        ",Yoda,Côté Obscur\n"
+        "2026-01-01T10:00:00,Yoda,Côté Obscur\n"
+        "2026-01-01T10:00:00,,Côté Obscur\n",
+        encoding="utf-8",
+    )
+    stockage = SqliteVoteStorage(str(tmp_path / "votes.db"))
+    assert import_csv(str(source), stockage, chunksize=1) == 1
+    assert stockage.stats().total == 1
+    assert stockage.load()["username"].tolist() == [None]
+
+
+def test_sqlite_stats_are_read_from_a_single_snapshot(tmp_path):
+    stockage = SqliteVoteStorage(str(tmp_path / "votes.db"))
+    stockage.init()
+    fin = threading.Event()
+
+    def voter():
+        i = 0
+        while not fin.is_set():
+            stockage.add(f"P{i % 5}", "Côté Obscur" if i % 2 else "Côté Lumineux", "u")
+            i += 1
+
+    votant = threading.Thread(target=voter)
+    votant.start()
+    try:
+        for _ in range(500):
+            stats = stockage.stats()
+            assert stats.total == sum(stats.par_camp.values()) == sum(n for _, n in stats.classement)
+    finally:
+        fin.set()
+        votant.join()
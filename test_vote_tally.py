@@ -0,0 +1,62 @@
+import os
+
+import vote_tally
+from vote_tally import VoteTally
+
+ENTETE = "timestamp,personnage,camp,username\n"
+
+
+def _ecrire(chemin, texte, mode="a"):
+    with open(chemin, mode, encoding="utf-8") as f:
+        f.write(texte)
+
+
+def _votes(n, personnage="Yoda", camp="Côté Lumineux"):
+    return "".join(f"2026-10-18T08:{i % 60:02d}:00,{personnage},{camp},u{i}\n" for i in range(n))
+
+
+def test_log_is_read_in_chunks_across_line_boundaries(tmp_path, monkeypatch):
+    monkeypatch.setattr(vote_tally, "TAILLE_LECTURE", 7)                # plus court qu'une ligne : chaque ligne est coupée
+    chemin = str(tmp_path / "votes.csv")
+    _ecrire(chemin, ENTETE + _votes(50) + _votes(20, "Vador", "Côté Obscur"), "w")
+
+    stats = VoteTally(chemin).stats()
+    assert stats.total == 70
+    assert stats.par_camp == {"Côté Lumineux": 50, "Côté Obscur": 20}
+    assert stats.classement == [("Yoda", 50), ("Vador", 20)]
+
+
+def test_line_being_written_is_counted_once_complete(tmp_path):
+    chemin = str(tmp_path / "votes.csv")
+    _ecrire(chemin, ENTETE + _votes(3) + "2026-10-18T08:00:00,Lei", "w")
+    tally = VoteTally(chemin)
+    assert tally.stats().total == 3
+
+    _ecrire(chemin, "a,Côté Lumineux,leia\n")
+    assert tally.stats().total == 4
+    assert dict(tally.stats().classement) == {"Yoda": 3, "Leia": 1}
+    assert tally.log_size == os.path.getsize(chemin)
+
+
+def test_truncated_log_is_counted_again_from_the_start(tmp_path):
+    chemin = str(tmp_path / "votes.csv")
+    _ecrire(chemin, ENTETE + _votes(10), "w")
+    tally = VoteTally(chemin)
+    assert tally.stats().total == 10
+
+    _ecrire(chemin, ENTETE + _votes(2, "Han"), "w")                     # même fichier, plus court
+    assert tally.stats() == (2, {"Côté Lumineux": 2}, [("Han", 2)])
+
+
+def test_replaced_log_is_counted_again_from_the_start(tmp_path):
+    chemin = str(tmp_path / "votes.csv")
+    _ecrire(chemin, ENTETE + _votes(3), "w")
+    tally = VoteTally(chemin)
+    assert tally.stats().total == 3
+
+    _ecrire(str(tmp_path / "nouveau.csv"), ENTETE + _votes(5, "Han"), "w")
+    os.replace(tmp_path / "nouveau.csv", chemin)                         # autre fichier, plus long
+    assert tally.stats() == (5, {"Côté Lumineux": 5}, [("Han", 5)])
+
+    os.remove(chemin)
+    assert tally.stats().total == 0
@@ -0,0 +1,151 @@
+# --------------------
+# COMPTES UTILISATEURS
+# --------------------
+# Les comptes sont lus depuis users.csv (ou une table "users" d'une base SQLite) une seule fois par processus,
+# dans un dictionnaire indexé par nom d'utilisateur : la connexion et la vérification du rôle restent en temps constant
+# quel que soit le nombre de comptes. Les mots de passe en clair sont hachés (bcrypt) au chargement, pas à chaque rerun,
+# et le fichier n'est relu que s'il a été modifié.
+#
+# Pour hacher une fois pour toutes les mots de passe du fichier : python user_store.py --hash users.csv
+
+import argparse
+import csv
+import os
+import sqlite3
+import sys
+import threading
+from collections import ChainMap
+from collections.abc import MutableMapping
+
+from streamlit_authenticator import Hasher
+
+USERS_FILE = os.environ.get("USERS_FILE", "users.csv")            # fichier des comptes (.csv, ou .db / .sqlite pour une base SQLite)
+USER_COLUMNS = ["username", "name", "password", "email", "role"]
+ADMIN_ROLE = "administrateur"
+
+
+class UserStore:
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._signature = None                                      # (mtime, taille) du fichier au dernier chargement
+        self._comptes = {}                                          # {nom d'utilisateur en minuscules: {"name", "password", "email", "role"}}
+        self._hashes = {}                                           # {(nom d'utilisateur, mot de passe en clair): hash}, pour ne pas re-hacher au rechargement
+
+    # Comptes au format attendu par streamlit-authenticator, rechargés seulement si le fichier a changé :
+    def accounts(self):
+        stat = os.stat(self.path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if signature != self._signature:
+            with self._lock:
+                if signature != self._signature:
+                    self._comptes = self._charger()
+                    self._signature = signature
+        return self._comptes
+
+    def role(self, username):
+        compte = self.accounts().get((username or "").lower())
+        return compte["role"] if compte else None
+
+    def is_admin(self, username):
+        return self.role(username) == ADMIN_ROLE
+
+    def _charger(self):
+        comptes = {}
+        for ligne in _lire(self.path):
+            username = ligne["username"].strip().lower()            # streamlit-authenticator compare les noms en minuscules
+            comptes[username] = {
+                "name": ligne["name"],
+                "password": self._hacher(username, ligne["password"]),
+                "email": ligne["email"],
+                "role": sys.intern(ligne["role"]),                  # quelques rôles seulement : une seule copie de chaque chaîne en mémoire
+            }
+        return comptes
+
+    def _hacher(self, username, password):
+        if Hasher.is_hash(password):
+            return password
+        cle = (username, password)
+        if cle not in self._hashes:
+            self._hashes[cle] = Hasher.hash(password)
+        return self._hashes[cle]
+
+
+# Comptes vus par une session de streamlit-authenticator, sans copier tous les comptes partagés : les comptes sont lus
+# dans le dictionnaire du UserStore, mais chaque compte utilisé par la session reçoit sa propre couche d'écriture, où
+# l'authentificateur enregistre l'état de connexion ("logged_in", "failed_login_attempts") sans toucher au compte partagé.
+class SessionAccounts(MutableMapping):
+    def __init__(self, comptes):
+        self._comptes = comptes                                     # comptes partagés par toutes les sessions, jamais modifiés ici
+        self._session = {}                                          # {nom d'utilisateur: ChainMap(état de la session, compte partagé)}
+
+    def __getitem__(self, username):
+        compte = self._session.get(username)
+        if compte is None:
+            compte = self._session[username] = ChainMap({}, self._comptes[username])
+        return compte
+
+    def __setitem__(self, username, compte):
+        self._session[username] = compte
+
+    def __delitem__(self, username):
+        del self._session[username]
+
+    def __contains__(self, username):
+        return username in self._session or username in self._comptes
+
+    def __iter__(self):
+        yield from self._comptes
+        yield from (username for username in self._session if username not in self._comptes)
+
+    def __len__(self):
+        return len(self._comptes) + sum(1 for username in self._session if username not in self._comptes)
+
+
+# Lignes de comptes (dictionnaires avec les colonnes USER_COLUMNS) depuis un fichier CSV ou une base SQLite :
+def _lire(path):
+    if path.endswith((".db", ".sqlite")):
+        conn = sqlite3.connect(path)
+        conn.row_factory = sqlite3.Row
+        try:
+            return [dict(ligne) for ligne in conn.execute(f"SELECT {', '.join(USER_COLUMNS)} FROM users")]
+        finally:
+            conn.close()
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+# Comptes partagés par toutes les sessions : ce module n'est importé qu'une fois par processus,
+# et les comptes sont chargés (mots de passe hachés compris) dès l'import.
+_store = UserStore(USERS_FILE)
+if __name__ != "__main__":
+    _store.accounts()
+
+
+def get_user_store():
+    return _store
+
+
+# Remplace les mots de passe en clair d'un fichier CSV par leur hash bcrypt (les autres colonnes sont conservées) :
+def hash_file(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        lecteur = csv.DictReader(f)
+        colonnes = lecteur.fieldnames
+        lignes = list(lecteur)
+    for ligne in lignes:
+        if not Hasher.is_hash(ligne["password"]):
+            ligne["password"] = Hasher.hash(ligne["password"])
+    temporaire = f"{path}.tmp"
+    with open(temporaire, "w", newline="", encoding="utf-8") as f:
+        ecrivain = csv.DictWriter(f, fieldnames=colonnes)
+        ecrivain.writeheader()
+        ecrivain.writerows(lignes)
+    os.replace(temporaire, path)
+    return len(lignes)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Outils pour le fichier des comptes")
+    parser.add_argument("--hash", metavar="CSV", required=True, help="hacher les mots de passe en clair du fichier")
+    args = parser.parse_args()
+    print(f"{hash_file(args.hash)} comptes traités dans {args.hash}")
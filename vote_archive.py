@@ -0,0 +1,132 @@
+# --------------------
+# ARCHIVES ET INSTANTANÉS DES VOTES
+# --------------------
+# Pour que votes.csv ne grossisse pas indéfiniment, le journal des votes est régulièrement "compacté" :
+#   - le fichier en cours est renommé en segment, et un nouveau votes.csv vide prend sa place ;
+#   - les compteurs (par personnage, par camp, agrégats par période) qui comptent ce segment sont enregistrés dans
+#     un instantané en JSON compressé : au démarrage, on charge l'instantané puis on ne lit que la fin du journal ;
+#   - le segment est ensuite archivé en Parquet (colonnes compressées), ou en CSV compressé si pyarrow n'est pas installé.
+# Les votes sont rangés par "époque" : réinitialiser les votes ouvre simplement une nouvelle époque, et les archives
+# des époques précédentes restent sur le disque.
+#
+# Organisation du dossier, à côté du fichier de votes (votes.csv -> votes_archive/) :
+#   epoch-0001/snapshot.json.gz                   instantané de l'époque
+#   epoch-0001/segment-20261018T083800123456.csv  segment renommé, pas encore archivé
+#   epoch-0001/segment-20261018T083800123456.parquet
+#   .lock                                         une seule compaction à la fois, même entre plusieurs processus
+
+import contextlib
+import glob
+import gzip
+import json
+import os
+import threading
+from datetime import datetime
+
+import pandas as pd
+
+try:
+    import pyarrow                                                  # noqa: F401 (utilisé par pandas pour écrire le Parquet)
+except ImportError:                                                 # sans pyarrow, les segments sont archivés en CSV compressé
+    pyarrow = None
+
+try:
+    import fcntl                                                    # verrou entre processus (Linux / macOS)
+except ImportError:                                                 # pas de fcntl sous Windows : seul le verrou entre threads s'applique
+    fcntl = None
+
+SNAPSHOT_FILE = "snapshot.json.gz"
+ARCHIVE_SUFFIXES = (".parquet", ".csv.gz")                          # segments archivés, selon que pyarrow est installé ou non
+
+
+# Dossier des archives d'un fichier de votes :
+def archive_dir_for(path):
+    return f"{os.path.splitext(path)[0]}_archive"
+
+
+class VoteArchive:
+    def __init__(self, dossier):
+        self.dossier = dossier
+        self._verrou = threading.Lock()
+
+    def _dossier_epoque(self, epoch):
+        return os.path.join(self.dossier, f"epoch-{epoch:04d}")
+
+    # Numéro de l'époque en cours (la plus récente), 1 s'il n'y en a encore aucune :
+    def epoch(self):
+        dossiers = glob.glob(os.path.join(self.dossier, "epoch-[0-9]*"))
+        return max((int(os.path.basename(d)[len("epoch-"):]) for d in dossiers), default=1)
+
+    # Ouvre une nouvelle époque (réinitialisation des votes) et renvoie son numéro :
+    def new_epoch(self):
+        epoch = self.epoch() + 1
+        os.makedirs(self._dossier_epoque(epoch), exist_ok=True)
+        return epoch
+
+    # Instantané d'une époque ({"total", "par_personnage", "par_camp", "rollups", "dernier_segment"}), ou None :
+    def load_snapshot(self, epoch):
+        try:
+            with gzip.open(os.path.join(self._dossier_epoque(epoch), SNAPSHOT_FILE), "rt", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def save_snapshot(self, epoch, etat):
+        chemin = os.path.join(self._dossier_epoque(epoch), SNAPSHOT_FILE)
+        with gzip.open(chemin + ".tmp", "wt", encoding="utf-8") as f:
+            json.dump(etat, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(chemin + ".tmp", chemin)                         # remplacement atomique : jamais d'instantané à moitié écrit
+
+    # Chemin du prochain segment de l'époque (les noms se trient dans l'ordre chronologique) :
+    def new_segment(self, epoch):
+        dossier = self._dossier_epoque(epoch)
+        os.makedirs(dossier, exist_ok=True)
+        return os.path.join(dossier, f"segment-{datetime.now():%Y%m%dT%H%M%S%f}.csv")
+
+    # Segments renommés mais pas encore archivés d'une époque, du plus ancien au plus récent :
+    def pending(self, epoch):
+        return sorted(glob.glob(os.path.join(self._dossier_epoque(epoch), "segment-*.csv")))
+
+    # Archive les segments en attente de toutes les époques, sauf ceux de l'époque en cours que l'instantané ne compte
+    # pas encore (nom postérieur à dernier_segment) : ils sont toujours lus au démarrage, ils doivent rester en CSV.
+    def archive_pending(self, epoch, dernier_segment):
+        for segment in sorted(glob.glob(os.path.join(self.dossier, "epoch-*", "segment-*.csv"))):
+            if os.path.dirname(segment) == self._dossier_epoque(epoch) and os.path.basename(segment) > (dernier_segment or ""):
+                continue
+            votes = pd.read_csv(segment, dtype=str, keep_default_na=False)
+            archive = segment[:-len(".csv")] + (".parquet" if pyarrow is not None else ".csv.gz")
+            if pyarrow is not None:
+                votes.to_parquet(archive + ".tmp", index=False)
+            else:
+                votes.to_csv(archive + ".tmp", index=False, compression="gzip")
+            os.replace(archive + ".tmp", archive)
+            os.remove(segment)
+
+    # Votes d'une époque déjà sortis du journal (segments archivés ou en attente), par segment dans l'ordre chronologique :
+    def frames(self, epoch):
+        segments = {}                                               # {nom sans extension: chemin}, l'archive l'emporte sur le CSV en attente
+        for chemin in sorted(glob.glob(os.path.join(self._dossier_epoque(epoch), "segment-*"))):
+            for suffixe in ARCHIVE_SUFFIXES + (".csv",):
+                if chemin.endswith(suffixe):
+                    nom = chemin[:-len(suffixe)]
+                    if suffixe != ".csv" or nom not in segments:
+                        segments[nom] = chemin
+                    break
+        for _, chemin in sorted(segments.items()):
+            if chemin.endswith(".parquet"):
+                yield pd.read_parquet(chemin)
+            else:
+                yield pd.read_csv(chemin, dtype=str, keep_default_na=False)
+
+    # Verrou de compaction, entre les threads de ce processus et avec les autres processus :
+    @contextlib.contextmanager
+    def lock(self):
+        os.makedirs(self.dossier, exist_ok=True)
+        with self._verrou:
+            fd = os.open(os.path.join(self.dossier, ".lock"), os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_EX)
+                yield
+            finally:
+                os.close(fd)                                        # fermer le descripteur libère aussi le verrou flock
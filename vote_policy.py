@@ -0,0 +1,106 @@
+# --------------------
+# RÈGLES DE VOTE (ANTI-DOUBLONS ET LIMITES)
+# --------------------
+# Avant d'enregistrer un vote, on vérifie pour l'utilisateur connecté :
+#   - que ce n'est pas un double envoi du même formulaire (clé d'idempotence déjà vue) ;
+#   - qu'il n'a pas déjà voté dans la fenêtre de temps en cours (un vote par fenêtre) ;
+#   - qu'il lui reste un jeton dans son "seau" (limite de débit : rafale maximale, puis un jeton regagné à intervalle régulier).
+# L'état de chaque utilisateur est gardé dans un index en mémoire de taille bornée (les plus anciens sont oubliés,
+# et les entrées expirent) : la mémoire reste stable quel que soit le nombre de votants. Cet index est propre au processus.
+
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+
+class VoteDecision(NamedTuple):
+    allowed: bool
+    reason: Optional[str] = None                                    # raison du refus, à afficher à l'utilisateur
+    retry_after: float = 0.0                                        # secondes à attendre avant de pouvoir revoter
+
+
+# Dictionnaire borné : au plus `max_size` entrées, chacune oubliée `ttl` secondes après sa dernière mise à jour.
+class BoundedTTLCache:
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entrees = OrderedDict()                               # {clé: (instant de mise à jour, valeur)}, de la plus ancienne à la plus récente
+
+    def __len__(self):
+        return len(self._entrees)
+
+    def get(self, cle, maintenant):
+        entree = self._entrees.get(cle)
+        if entree is None:
+            return None
+        if maintenant - entree[0] > self.ttl:
+            del self._entrees[cle]
+            return None
+        return entree[1]
+
+    def pop(self, cle):
+        entree = self._entrees.pop(cle, None)
+        return None if entree is None else entree[1]
+
+    def set(self, cle, valeur, maintenant):
+        self._entrees[cle] = (maintenant, valeur)
+        self._entrees.move_to_end(cle)
+        while self._entrees:                                        # entrées expirées (en tête, car les plus anciennes)
+            premiere = next(iter(self._entrees.values()))
+            if maintenant - premiere[0] <= self.ttl:
+                break
+            self._entrees.popitem(last=False)
+        while len(self._entrees) > self.max_size:                   # trop d'entrées : on oublie la moins récemment utilisée
+            self._entrees.popitem(last=False)
+
+
+class VotePolicy:
+    # window          : un seul vote par utilisateur pendant cette durée (secondes), 0 pour désactiver
+    # burst, refill   : seau de jetons — au plus `burst` votes d'affilée, puis un jeton regagné toutes les `refill` secondes
+    #                   (refill = 0 : pas de limite de débit)
+    # idempotency_ttl : durée pendant laquelle une clé d'idempotence déjà utilisée est refusée
+    # max_users       : taille maximale de l'index des votants récents (et des clés d'idempotence)
+    def __init__(self, window=5.0, burst=10, refill=60.0, idempotency_ttl=600.0, max_users=10_000):
+        if window < 0 or refill < 0 or burst < 1:
+            raise ValueError(f"Règles de vote invalides : window={window!r}, burst={burst!r}, refill={refill!r}")
+        self.window = window
+        self.burst = burst
+        self.refill = refill
+        self._lock = threading.Lock()
+        self._votants = BoundedTTLCache(max_users, ttl=max(window, burst * refill))     # {utilisateur: (dernier vote, jetons, instant du calcul des jetons)}
+        self._cles = BoundedTTLCache(max_users, ttl=idempotency_ttl)                      # {clé d'idempotence: True}
+
+    # Vérifie si `username` peut voter maintenant et, si oui, enregistre le vote dans l'index (voir release() si le vote
+    # ne peut finalement pas être enregistré) :
+    def check(self, username, idempotency_key=None, maintenant=None):
+        maintenant = time.monotonic() if maintenant is None else maintenant
+        with self._lock:
+            if idempotency_key is not None and self._cles.get(idempotency_key, maintenant):
+                return VoteDecision(False, "Ce vote a déjà été enregistré.")
+
+            dernier, jetons, calcul = self._votants.get(username, maintenant) or (None, float(self.burst), maintenant)
+            if dernier is not None and maintenant - dernier < self.window:
+                return VoteDecision(False, "Un seul vote par personne à la fois, patiente un peu.", self.window - (maintenant - dernier))
+
+            jetons = float(self.burst) if not self.refill else min(float(self.burst), jetons + (maintenant - calcul) / self.refill)
+            if jetons < 1:
+                return VoteDecision(False, "Trop de votes : reviens un peu plus tard.", (1 - jetons) * self.refill)
+
+            self._votants.set(username, (maintenant, jetons - 1, maintenant), maintenant)
+            if idempotency_key is not None:
+                self._cles.set(idempotency_key, True, maintenant)
+            return VoteDecision(True)
+
+    # Annule un vote accepté par check() qui n'a pas pu être enregistré (erreur d'écriture) : le jeton est rendu,
+    # la clé d'idempotence oubliée, et l'utilisateur peut revoter tout de suite. Le vote précédent, s'il y en a un,
+    # est déjà sorti de la fenêtre : check() l'a vérifié.
+    def release(self, username, idempotency_key=None, maintenant=None):
+        maintenant = time.monotonic() if maintenant is None else maintenant
+        with self._lock:
+            if idempotency_key is not None:
+                self._cles.pop(idempotency_key)
+            etat = self._votants.get(username, maintenant)
+            if etat is not None:
+                _, jetons, calcul = etat
+                self._votants.set(username, (None, min(float(self.burst), jetons + 1), calcul), maintenant)
@@ -0,0 +1,111 @@
+# --------------------
+# AGRÉGATS DES VOTES PAR PÉRIODE
+# --------------------
+# Pour les tendances ("votes par heure et par personnage", "classement des 15 dernières minutes"…), on ne relit jamais
+# les votes bruts : on tient à jour, au fil des votes, des compteurs par tranche de temps (minute, heure, jour)
+# et par (personnage, camp). Le coût d'une vue dépend alors du nombre de tranches, pas du nombre de votes.
+#
+# Les horodatages sont au format ISO "2026-02-13T12:14:14" : le début de la tranche est simplement un préfixe du texte
+# ("2026-02-13T12:14" pour la minute, "2026-02-13T12" pour l'heure, "2026-02-13" pour le jour).
+
+import threading
+from collections import Counter
+from datetime import datetime, timedelta
+
+# {granularité: longueur du préfixe de l'horodatage}
+GRANULARITIES = {"minute": 16, "heure": 13, "jour": 10}
+
+# Durée de conservation des tranches (None = pour toujours) : les tranches par minute ne servent qu'aux fenêtres courtes.
+RETENTION = {"minute": timedelta(days=2), "heure": timedelta(days=90), "jour": None}
+PURGE_EVERY = 60                                                    # les tranches trop anciennes sont oubliées toutes les 60 nouvelles tranches
+
+
+# Début de la tranche à partir de laquelle garder les votes pour une fenêtre glissante (ex. les 15 dernières minutes) :
+def window_start(granularite, duree, maintenant=None):
+    maintenant = maintenant or datetime.now()
+    return (maintenant - duree).isoformat(timespec="seconds")[:GRANULARITIES[granularite]]
+
+
+class VoteRollups:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self._tranches = {g: {} for g in GRANULARITIES}         # {granularité: {début de tranche: Counter{(personnage, camp): votes}}}
+            self._nouvelles = {g: 0 for g in GRANULARITIES}         # tranches créées depuis la dernière purge
+
+    # Compte un vote dans sa tranche de chaque granularité :
+    def add(self, timestamp, personnage, camp):
+        self.add_counts({(timestamp[:GRANULARITIES["minute"]], personnage, camp): 1})
+
+    # Ajoute des votes déjà regroupés par minute : {(début de la minute, personnage, camp): votes}.
+    # Les heures sont calculées à partir des minutes, puis les jours à partir des heures : quand beaucoup de lignes
+    # sont lues d'un coup, chaque niveau ne parcourt que les tranches du niveau précédent, pas les votes.
+    def add_counts(self, par_minute):
+        niveaux = {"minute": Counter({cle: n for cle, n in par_minute.items() if len(cle[0]) >= GRANULARITIES["minute"]})}
+        if not niveaux["minute"]:                                   # sans horodatage valide, un vote n'entre dans aucune tranche
+            return
+        precedent = niveaux["minute"]
+        for granularite in ("heure", "jour"):
+            longueur = GRANULARITIES[granularite]
+            niveau = niveaux[granularite] = Counter()
+            for (debut, personnage, camp), votes in precedent.items():
+                niveau[(debut[:longueur], personnage, camp)] += votes
+            precedent = niveau
+
+        limites = self._limites(max(minute for minute, _, _ in niveaux["minute"]))
+        with self._lock:
+            for granularite, niveau in niveaux.items():
+                tranches = self._tranches[granularite]
+                limite = limites[granularite]
+                for (debut, personnage, camp), votes in niveau.items():
+                    if debut < limite:                              # tranche déjà trop ancienne : inutile de la créer
+                        continue
+                    compteur = tranches.get(debut)
+                    if compteur is None:                            # nouvelle tranche : de temps en temps, on en profite pour oublier les trop anciennes
+                        compteur = tranches[debut] = Counter()
+                        self._nouvelles[granularite] += 1
+                        if self._nouvelles[granularite] >= PURGE_EVERY:
+                            self._nouvelles[granularite] = 0
+                            self._purger(granularite, limite)
+                    compteur[(personnage, camp)] += votes
+
+    # Début de la plus ancienne tranche à conserver pour chaque granularité, d'après le vote le plus récent :
+    def _limites(self, minute):
+        limites = {}
+        for granularite, retention in RETENTION.items():
+            try:
+                limites[granularite] = "" if retention is None else window_start(granularite, retention, datetime.fromisoformat(minute))
+            except ValueError:
+                limites[granularite] = ""
+        return limites
+
+    def _purger(self, granularite, limite):
+        tranches = self._tranches[granularite]
+        for debut in [d for d in tranches if d < limite]:
+            del tranches[debut]
+
+    # Lignes (début de tranche, personnage, camp, votes) d'une granularité, éventuellement à partir d'une tranche donnée :
+    def rows(self, granularite, since=None):
+        with self._lock:
+            return [
+                (debut, personnage, camp, votes)
+                for debut, compteur in sorted(self._tranches[granularite].items())
+                if since is None or debut >= since
+                for (personnage, camp), votes in compteur.items()
+            ]
+
+    # Toutes les tranches, par granularité, pour les enregistrer dans l'instantané des votes : {granularité: [lignes]}
+    def export(self):
+        return {granularite: self.rows(granularite) for granularite in GRANULARITIES}
+
+    # Remplace les tranches par celles d'un instantané (chaque niveau est repris tel quel, sans recalcul) :
+    def restore(self, etat):
+        self.clear()
+        with self._lock:
+            for granularite, lignes in etat.items():
+                tranches = self._tranches[granularite]
+                for debut, personnage, camp, votes in lignes:
+                    tranches.setdefault(debut, Counter())[(personnage, camp)] += votes
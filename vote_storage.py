@@ -0,0 +1,305 @@
+# --------------------
+# STOCKAGE DES VOTES
+# --------------------
+# Deux façons de stocker les votes, avec les mêmes méthodes :
+#   - CsvVoteStorage    : le fichier votes.csv historique (compteurs incrémentaux + écriture groupée), compacté
+#                         régulièrement dans des archives et un instantané (voir vote_archive.py) ;
+#   - SqliteVoteStorage : une base SQLite embarquée (mode WAL, index), où les statistiques sont calculées par des GROUP BY.
+# Dans les deux cas, réinitialiser les votes ouvre une nouvelle "époque" : les votes précédents sont conservés (archives
+# du fichier CSV, ou lignes de la base marquées d'un numéro d'époque) mais ne sont plus comptés.
+# Les fonctions de votes.py choisissent l'un ou l'autre selon la configuration.
+
+import os
+import sqlite3
+import threading
+from collections import Counter
+from datetime import datetime
+
+import pandas as pd
+
+from vote_archive import VoteArchive, archive_dir_for
+from vote_rollups import GRANULARITIES, RETENTION, VoteRollups, window_start
+from vote_tally import VoteStats, VoteTally
+from vote_writer import VoteWriter
+
+VOTES_COLUMNS = ["timestamp", "personnage", "camp", "username"]         # username : qui a voté, pour pouvoir repérer les doublons après coup
+ROLLUP_COLUMNS = ["debut", "personnage", "camp", "votes"]
+EPOCH_COURANTE = "SELECT MAX(epoch) FROM vote_epochs"                   # époque des votes comptés par la base SQLite
+COMPACT_BYTES = 8 * 1024 * 1024                                         # taille du journal votes.csv qui déclenche une compaction
+
+
+# Date et heure d'un vote, au format enregistré dans les fichiers :
+def horodatage():
+    return datetime.now().isoformat(timespec="seconds")
+
+
+class CsvVoteStorage:
+    # compact_bytes : taille du journal au-delà de laquelle il est compacté en arrière-plan (None pour ne jamais compacter)
+    def __init__(self, path, batch_size=256, max_delay=0.02, fsync_interval=None, compact_bytes=COMPACT_BYTES):
+        self.path = path
+        self.compact_bytes = compact_bytes
+        self._archive = VoteArchive(archive_dir_for(path))                  # instantanés et votes archivés, par époque
+        self._rollups = VoteRollups()                                       # agrégats par minute / heure / jour
+        self._tally = VoteTally(path, self._rollups, self._archive)         # compteurs partagés par toutes les sessions
+        self._writer = VoteWriter(path, VOTES_COLUMNS, batch_size, max_delay, fsync_interval)
+        self._entete_verifiee = False
+        self._compaction = threading.Lock()                                 # au plus une compaction en arrière-plan à la fois
+
+    # Assure que le fichier de votes existe, sinon le crée avec les bonnes colonnes :
+    def init(self):
+        if not os.path.exists(self.path):
+            self._writer.create()                                           # jamais de troncature si un autre processus vient de le créer
+        elif not self._entete_verifiee:                                     # une fois par processus : fichier d'une version précédente ?
+            self._writer.locked(self._ajouter_colonnes)
+        self._entete_verifiee = True
+
+    # Ajoute à un ancien fichier les colonnes qui lui manquent (vides pour les votes déjà enregistrés), ligne par ligne.
+    # Appelé sous le verrou de l'écrivain (flock compris) : aucun processus n'écrit dans l'ancien fichier pendant la copie.
+    def _ajouter_colonnes(self):
+        with open(self.path, encoding="utf-8") as f:
+            colonnes = f.readline().rstrip("\r\n").split(",")
+        manquantes = VOTES_COLUMNS[len(colonnes):]
+        if colonnes != VOTES_COLUMNS[:len(colonnes)] or not manquantes:
+            return
+        temporaire = f"{self.path}.tmp"
+        with open(self.path, encoding="utf-8", newline="") as source, open(temporaire, "w", encoding="utf-8", newline="") as cible:
+            cible.write(",".join(VOTES_COLUMNS) + "\n")
+            next(source)
+            suffixe = "," * len(manquantes)
+            for ligne in source:
+                cible.write(ligne.rstrip("\r\n") + suffixe + "\n")
+        os.replace(temporaire, self.path)                                   # le comptage en mémoire verra un nouveau fichier et recomptera
+
+    # Ajoute un vote (l'écrivain crée le fichier et son en-tête si besoin) et attend qu'il soit écrit.
+    # Seul le premier vote du processus vérifie l'en-tête d'un fichier existant (colonnes d'une version précédente).
+    def add(self, personnage, camp, username=None):
+        if not self._entete_verifiee:
+            self.init()
+        self._writer.submit([horodatage(), personnage, camp, username or ""])
+
+    # Tous les votes de l'époque en cours : segments archivés, puis journal.
+    def load(self):
+        self.init()
+        with self._archive.lock():                                          # pas de compaction pendant la lecture
+            morceaux = list(self._archive.frames(self._archive.epoch()))
+            morceaux.append(pd.read_csv(self.path, dtype=str, keep_default_na=False))
+        return pd.concat(morceaux, ignore_index=True)
+
+    # Réinitialise les votes en ouvrant une nouvelle époque : les votes de l'époque qui se termine sont archivés, pas effacés.
+    def reset(self):
+        self.compact()                                                      # l'instantané de l'époque qui se termine compte ses votes
+        with self._archive.lock():
+            epoch = self._archive.epoch()
+            segment = self._archive.new_segment(epoch)
+            nouvelle = self._archive.new_epoch()
+            # Le journal est toujours renommé, même s'il ne contient que l'en-tête (derniers votes arrivés entre-temps) :
+            # les autres processus voient un nouveau fichier et rechargent alors l'époque qui vient d'être ouverte.
+            self._writer.rotate(segment, -1)
+            self._tally.invalidate()                                        # les compteurs en mémoire repartent de zéro
+            self._archive.archive_pending(nouvelle, None)
+
+    # Compacte le journal : il est renommé en segment, l'instantané de l'époque est mis à jour pour compter ce segment,
+    # puis les segments comptés sont archivés. Les compteurs en mémoire restent identiques.
+    def compact(self):
+        self.init()
+        with self._archive.lock():
+            epoch = self._archive.epoch()
+            if self._tally.epoch != epoch:                                  # réinitialisation par une autre instance depuis le dernier comptage
+                self._tally.invalidate()
+            pivot = self._tally.rotate(lambda _: self._writer.rotate(self._archive.new_segment(epoch), self._taille_entete()))
+            if pivot is None:                                               # journal vide : rien à compacter
+                return
+            epoch, etat = pivot
+            self._archive.save_snapshot(epoch, etat)
+            self._archive.archive_pending(epoch, etat["dernier_segment"])
+
+    # Taille d'un journal qui ne contient que l'en-tête (l'écrivain termine toujours les lignes par "\n", même sous Windows) :
+    def _taille_entete(self):
+        return len(",".join(VOTES_COLUMNS).encode("utf-8")) + len("\n")
+
+    # Lance une compaction en arrière-plan quand le journal dépasse compact_bytes (sans faire attendre la session) :
+    def _compacter_si_besoin(self):
+        if self.compact_bytes is None or self._tally.log_size < self.compact_bytes:
+            return
+        if not self._compaction.acquire(blocking=False):                    # compaction déjà en cours
+            return
+        def _compacter():
+            try:
+                self.compact()
+            finally:
+                self._compaction.release()
+        threading.Thread(target=_compacter, name="vote-compaction", daemon=True).start()
+
+    # Statistiques tirées des compteurs en mémoire : seules les lignes ajoutées depuis la dernière fois sont lues.
+    def stats(self):
+        self.init()
+        stats = self._tally.stats()
+        self._compacter_si_besoin()
+        return stats
+
+    # Votes par tranche de temps (granularité "minute", "heure" ou "jour"), à partir de la tranche since si elle est donnée :
+    def rollup(self, granularite, since=None):
+        self.init()
+        self._tally.refresh()
+        self._compacter_si_besoin()
+        return pd.DataFrame(self._rollups.rows(granularite, since), columns=ROLLUP_COLUMNS)
+
+
+class SqliteVoteStorage:
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()                                     # une connexion par thread (sqlite3 l'impose)
+        self._schema_pret = False
+
+    def _connexion(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")                         # les lectures ne bloquent pas les écritures (et inversement)
+            conn.execute("PRAGMA synchronous=NORMAL")                       # suffisant en mode WAL, et bien plus rapide que FULL
+            self._local.conn = conn
+        return conn
+
+    # Crée la table et ses index s'ils n'existent pas encore :
+    def init(self):
+        if self._schema_pret:
+            return
+        with self._connexion() as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS votes (
+                    id INTEGER PRIMARY KEY,
+                    timestamp TEXT NOT NULL,
+                    personnage TEXT NOT NULL,
+                    camp TEXT NOT NULL,
+                    username TEXT,
+                    epoch INTEGER NOT NULL DEFAULT 1
+                );
+                CREATE TABLE IF NOT EXISTS vote_epochs (
+                    epoch INTEGER PRIMARY KEY,
+                    debut TEXT NOT NULL
+                );
+                INSERT OR IGNORE INTO vote_epochs VALUES (1, datetime('now', 'localtime'));
+                CREATE INDEX IF NOT EXISTS idx_votes_timestamp ON votes (timestamp);
+            """)
+            colonnes = [colonne[1] for colonne in conn.execute("PRAGMA table_info(votes)")]
+            if "username" not in colonnes:                                  # base d'une version précédente
+                conn.execute("ALTER TABLE votes ADD COLUMN username TEXT")
+            if "epoch" not in colonnes:                                     # votes d'avant les époques : tous dans la première
+                conn.execute("ALTER TABLE votes ADD COLUMN epoch INTEGER NOT NULL DEFAULT 1")
+            conn.executescript("""
+                DROP INDEX IF EXISTS idx_votes_personnage;
+                DROP INDEX IF EXISTS idx_votes_camp;
+                CREATE INDEX IF NOT EXISTS idx_votes_epoch_personnage ON votes (epoch, personnage);
+                CREATE INDEX IF NOT EXISTS idx_votes_epoch_camp ON votes (epoch, camp);
+                CREATE INDEX IF NOT EXISTS idx_votes_username ON votes (username);
+            """)
+            if not conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'vote_rollups'").fetchone():
+                conn.execute("""
+                    CREATE TABLE vote_rollups (
+                        granularite TEXT NOT NULL,
+                        debut TEXT NOT NULL,
+                        personnage TEXT NOT NULL,
+                        camp TEXT NOT NULL,
+                        votes INTEGER NOT NULL,
+                        PRIMARY KEY (granularite, debut, personnage, camp)
+                    ) WITHOUT ROWID
+                """)
+                for granularite, longueur in GRANULARITIES.items():         # base créée avant les agrégats : on les calcule une fois
+                    conn.execute(f"""
+                        INSERT INTO vote_rollups
+                        SELECT ?, substr(timestamp, 1, {longueur}), personnage, camp, COUNT(*)
+                        FROM votes WHERE length(timestamp) >= {GRANULARITIES["minute"]}
+                        GROUP BY 2, 3, 4
+                    """, (granularite,))
+        self._schema_pret = True
+
+    def add(self, personnage, camp, username=None):
+        self.add_many([(horodatage(), personnage, camp, username)])
+
+    # Insère plusieurs votes (timestamp, personnage, camp, username) dans une seule transaction, avec les agrégats par période :
+    def add_many(self, lignes):
+        self.init()
+        lignes = list(lignes)
+        agregats = Counter(
+            (granularite, ts[:longueur], personnage, camp)
+            for ts, personnage, camp, _ in lignes if ts and len(ts) >= GRANULARITIES["minute"]
+            for granularite, longueur in GRANULARITIES.items()
+        )
+        with self._connexion() as conn:
+            conn.executemany(
+                f"INSERT INTO votes (timestamp, personnage, camp, username, epoch) VALUES (?, ?, ?, ?, ({EPOCH_COURANTE}))", lignes
+            )
+            conn.executemany("""
+                INSERT INTO vote_rollups VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (granularite, debut, personnage, camp) DO UPDATE SET votes = votes + excluded.votes
+            """, [(*cle, n) for cle, n in agregats.items()])
+            conn.execute(                                                   # les tranches par minute ne sont gardées que peu de temps
+                "DELETE FROM vote_rollups WHERE granularite = 'minute' AND debut < ?",
+                (window_start("minute", RETENTION["minute"]),),
+            )
+
+    # Tous les votes de l'époque en cours :
+    def load(self):
+        self.init()
+        return pd.read_sql_query(
+            f"SELECT timestamp, personnage, camp, username FROM votes WHERE epoch = ({EPOCH_COURANTE}) ORDER BY id", self._connexion()
+        )
+
+    # Ouvre une nouvelle époque : les votes précédents restent dans la table, seuls les agrégats (recalculables) sont effacés.
+    def reset(self):
+        self.init()
+        with self._connexion() as conn:
+            conn.execute("INSERT INTO vote_epochs VALUES ((SELECT MAX(epoch) + 1 FROM vote_epochs), datetime('now', 'localtime'))")
+            conn.execute("DELETE FROM vote_rollups")
+
+    # Statistiques de l'époque en cours calculées directement par SQLite (index (epoch, ...)), sans charger les votes en mémoire.
+    # Les requêtes sont lues dans une seule transaction : en mode WAL, elles voient toutes la base au même instant
+    # (ni vote ni réinitialisation concurrente entre le total, les camps et le classement).
+    def stats(self):
+        self.init()
+        conn = self._connexion()
+        conn.execute("BEGIN")
+        try:
+            epoch = conn.execute(EPOCH_COURANTE).fetchone()[0]
+            total = conn.execute("SELECT COUNT(*) FROM votes WHERE epoch = ?", (epoch,)).fetchone()[0]
+            par_camp = dict(conn.execute("SELECT camp, COUNT(*) FROM votes WHERE epoch = ? GROUP BY camp", (epoch,)))
+            classement = conn.execute(
+                "SELECT personnage, COUNT(*) AS n FROM votes WHERE epoch = ? GROUP BY personnage ORDER BY n DESC, personnage", (epoch,)
+            ).fetchall()
+        finally:
+            conn.execute("COMMIT")
+        return VoteStats(total, par_camp, classement)
+
+    # Votes par tranche de temps, lus dans la table des agrégats :
+    def rollup(self, granularite, since=None):
+        self.init()
+        return pd.read_sql_query(
+            "SELECT debut, personnage, camp, votes FROM vote_rollups WHERE granularite = ? AND debut >= ? ORDER BY debut",
+            self._connexion(), params=(granularite, since or ""),
+        )
+
+
+# Crée le stockage demandé : "csv" (par défaut) ou "sqlite".
+# fsync_interval : politique de fsync du fichier CSV (voir VoteWriter), sans effet sur SQLite
+def open_storage(backend, path, fsync_interval=None):
+    if backend == "csv":
+        return CsvVoteStorage(path, fsync_interval=fsync_interval)
+    if backend == "sqlite":
+        return SqliteVoteStorage(path)
+    raise ValueError(f"Stockage de votes inconnu : {backend!r} (valeurs possibles : 'csv', 'sqlite')")
+
+
+# Importe un fichier votes.csv existant dans un stockage SQLite, par morceaux pour ne pas tout charger en mémoire.
+# Les fichiers d'avant la colonne "username" sont acceptés (votes importés sans utilisateur).
+def import_csv(csv_path, storage, chunksize=100_000):
+    return sum(import_frame(morceau, storage) for morceau in pd.read_csv(csv_path, dtype=str, keep_default_na=False, chunksize=chunksize))
+
+
+# Importe un DataFrame de votes (morceau de CSV ou segment archivé) dans un stockage SQLite.
+# Les lignes sans horodatage, personnage ou camp sont ignorées, comme dans le comptage du fichier CSV (voir vote_tally.py).
+def import_frame(morceau, storage):
+    morceau = morceau.reindex(columns=VOTES_COLUMNS).astype(object)
+    morceau = morceau.where(morceau.notna() & (morceau != ""), None)        # valeurs absentes ou vides -> NULL
+    morceau = morceau.dropna(subset=["timestamp", "personnage", "camp"])
+    storage.add_many(morceau.itertuples(index=False, name=None))
+    return len(morceau)
@@ -0,0 +1,188 @@
+# --------------------
+# COMPTAGE INCRÉMENTAL DES VOTES
+# --------------------
+# Au lieu de relire tout le fichier de votes à chaque rerun, on garde en mémoire (une seule fois par processus)
+# les compteurs par personnage et par camp, et on ne lit que les octets ajoutés depuis la dernière lecture.
+# Avec une archive (voir vote_archive.py), les compteurs partent de l'instantané de l'époque en cours : seuls les votes
+# écrits depuis la dernière compaction sont lus.
+
+import csv
+import os
+import threading
+from collections import Counter
+from typing import NamedTuple
+
+MINUTE = len("2026-01-01T00:00")                                   # longueur du début d'horodatage qui identifie la minute du vote
+TAILLE_LECTURE = 4 * 1024 * 1024                                    # taille des morceaux lus dans le fichier de votes
+
+
+# Photo des statistiques à un instant donné, utilisée par la page "Votes" :
+class VoteStats(NamedTuple):
+    total: int                                                      # nombre total de votes
+    par_camp: dict                                                  # {camp: nombre de votes}
+    classement: list                                                # [(personnage, nombre de votes)], du plus voté au moins voté
+
+
+class VoteTally:
+    # rollups : agrégats par période (VoteRollups) à alimenter avec les mêmes lignes, optionnel
+    # archive  : instantanés et segments compactés (VoteArchive), optionnel
+    def __init__(self, path, rollups=None, archive=None):
+        self.path = path
+        self.rollups = rollups
+        self.archive = archive
+        self.epoch = None                                           # époque dont les votes sont comptés
+        self._lock = threading.Lock()                               # plusieurs sessions Streamlit partagent le même objet
+        self._vider()
+
+    # Repart de l'état compacté (zéro sans archive) et oublie la position de lecture :
+    def _vider(self):
+        while True:
+            self.total = 0
+            self.par_personnage = Counter()
+            self.par_camp = Counter()
+            self._offset = 0                                        # position (en octets) jusqu'où le fichier a déjà été lu
+            self._identite = None                                   # (st_dev, st_ino) du fichier lu, pour détecter un remplacement
+            self._colonnes = None                                   # index des colonnes "timestamp", "personnage" et "camp", lus dans l'en-tête
+            self._dernier_segment = None                            # nom du dernier segment compacté compté
+            if self.rollups is not None:
+                self.rollups.clear()
+            if self.archive is None or self._charger_archive():
+                return
+
+    # Charge l'instantané de l'époque en cours, puis compte les segments qu'il ne compte pas encore
+    # (compaction interrompue, ou en cours dans un autre processus). Sans prendre le verrou de l'archive : si une compaction
+    # a enregistré un nouvel instantané entre-temps, ses segments ont pu être archivés avant d'être lus, et la vue n'est pas
+    # cohérente. Renvoie False dans ce cas, pour tout recharger.
+    def _charger_archive(self):
+        self.epoch = self.archive.epoch()
+        instantane = self.archive.load_snapshot(self.epoch)
+        if instantane is not None:
+            self.total = instantane["total"]
+            self.par_personnage.update(instantane["par_personnage"])
+            self.par_camp.update(instantane["par_camp"])
+            self._dernier_segment = instantane["dernier_segment"]
+            if self.rollups is not None:
+                self.rollups.restore(instantane["rollups"])
+        compte = self._dernier_segment
+        for segment in self.archive.pending(self.epoch):
+            nom = os.path.basename(segment)
+            if nom <= (self._dernier_segment or ""):                # déjà compté dans l'instantané, en attente d'archivage
+                continue
+            try:
+                with open(segment, encoding="utf-8", newline="") as f:
+                    lecteur = csv.reader(f)
+                    entete = next(lecteur, None)
+                    if entete is not None:
+                        self._ajouter(lecteur, _index_colonnes(entete))
+            except FileNotFoundError:                               # archivé entre-temps par une compaction
+                return False
+            self._dernier_segment = nom
+        if self.archive.epoch() != self.epoch:                      # réinitialisation entre-temps
+            return False
+        instantane = self.archive.load_snapshot(self.epoch)
+        return (instantane or {}).get("dernier_segment") == compte
+
+    # Octets du fichier déjà lus, c'est-à-dire la taille du journal depuis la dernière compaction :
+    @property
+    def log_size(self):
+        return self._offset
+
+    # Fait pivoter le journal : pivoter(epoch) renomme le fichier en segment (sous les verrous de l'appelant) et renvoie
+    # le chemin du segment, ou None s'il n'y avait rien à compacter. Les compteurs comptent alors ce segment en entier,
+    # et l'état à enregistrer dans le nouvel instantané est renvoyé avec son époque (None sinon).
+    def rotate(self, pivoter):
+        with self._lock:
+            segment = pivoter(self.epoch)
+            if segment is None:
+                return None
+            stat = os.stat(segment)
+            if (stat.st_dev, stat.st_ino) == self._identite and self.epoch == self.archive.epoch():
+                self._lire(segment, stat.st_size)                           # segment déjà lu en grande partie : on ne lit que la fin
+                self._offset, self._identite, self._colonnes = 0, None, None
+                self._dernier_segment = os.path.basename(segment)
+            else:                                                           # sinon, on repart de l'instantané et des segments en attente
+                self._vider()
+            etat = {
+                "total": self.total,
+                "par_personnage": dict(self.par_personnage),
+                "par_camp": dict(self.par_camp),
+                "rollups": self.rollups.export() if self.rollups is not None else {},
+                "dernier_segment": self._dernier_segment,
+            }
+            return self.epoch, etat
+
+    # Force un recomptage complet à la prochaine lecture :
+    def invalidate(self):
+        with self._lock:
+            self._vider()
+
+    # Lit uniquement les lignes ajoutées depuis la dernière lecture et met à jour les compteurs :
+    def refresh(self):
+        with self._lock:
+            try:
+                stat = os.stat(self.path)
+            except FileNotFoundError:
+                if self._identite is not None:                              # fichier supprimé ou renommé depuis la dernière lecture
+                    self._vider()
+                return
+
+            identite = (stat.st_dev, stat.st_ino)
+            if identite != self._identite or stat.st_size < self._offset:   # fichier remplacé ou tronqué : on recompte depuis le début
+                self._vider()
+                self._identite = identite
+            self._lire(self.path, stat.st_size)
+
+    # Compte les lignes complètes du fichier entre la position de lecture et `taille` octets, par morceaux de
+    # TAILLE_LECTURE octets : la mémoire utilisée ne dépend pas de la taille du journal (démarrage sans instantané).
+    def _lire(self, chemin, taille):
+        if taille == self._offset:                                          # rien de nouveau depuis la dernière lecture
+            return
+        with open(chemin, "rb") as f:
+            f.seek(self._offset)
+            reste = b""                                                     # début de ligne du morceau précédent
+            while self._offset + len(reste) < taille:
+                morceau = f.read(min(TAILLE_LECTURE, taille - self._offset - len(reste)))
+                if not morceau:                                             # fichier raccourci entre-temps
+                    return
+                data = reste + morceau
+                fin = data.rfind(b"\n") + 1                                 # une ligne en cours d'écriture sera lue au prochain passage
+                reste = data[fin:]
+                if fin == 0:
+                    continue
+                self._offset += fin
+                self._compter(data[:fin].decode("utf-8").splitlines())
+
+    def _compter(self, lignes):
+        lecteur = csv.reader(lignes)
+        if self._colonnes is None:                                          # première lecture : la première ligne est l'en-tête
+            entete = next(lecteur, None)
+            if entete is None:
+                return
+            self._colonnes = _index_colonnes(entete)
+        self._ajouter(lecteur, self._colonnes)
+
+    def _ajouter(self, lecteur, colonnes):
+        i_ts, i_perso, i_camp = colonnes
+        derniere = max(colonnes)
+        par_minute = Counter(                                               # un seul comptage par ligne : (minute, personnage, camp)
+            (ligne[i_ts][:MINUTE], ligne[i_perso], ligne[i_camp])
+            for ligne in lecteur
+            if len(ligne) > derniere                                        # ligne vide ou incomplète : ignorée
+        )
+        for (_, personnage, camp), votes in par_minute.items():
+            self.total += votes
+            self.par_personnage[personnage] += votes
+            self.par_camp[camp] += votes
+        if self.rollups is not None:
+            self.rollups.add_counts(par_minute)
+
+    # Met à jour les compteurs puis en renvoie une copie :
+    def stats(self):
+        self.refresh()
+        with self._lock:
+            return VoteStats(self.total, dict(self.par_camp), self.par_personnage.most_common())
+
+
+# Index des colonnes "timestamp", "personnage" et "camp" d'après l'en-tête :
+def _index_colonnes(entete):
+    return entete.index("timestamp"), entete.index("personnage"), entete.index("camp")
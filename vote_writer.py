@@ -0,0 +1,171 @@
+# --------------------
+# ÉCRITURE GROUPÉE DES VOTES
+# --------------------
+# Les votes reçus sont mis en file d'attente en mémoire, puis écrits par paquets ("group commit") :
+# un seul write() en mode ajout par paquet, sous verrou de fichier, pour que deux sessions ou deux processus
+# ne puissent jamais entrelacer des morceaux de lignes dans le fichier CSV.
+
+import csv
+import io
+import os
+import threading
+import time
+
+try:
+    import fcntl                                                    # verrou entre processus (Linux / macOS)
+except ImportError:                                                 # pas de fcntl sous Windows : seul le verrou entre threads s'applique
+    fcntl = None
+
+
+class VoteWriter:
+    # batch_size     : nombre de votes qui déclenche l'écriture immédiate du paquet
+    # max_delay      : temps maximum (en secondes) qu'un vote attend avant que son paquet soit écrit
+    # fsync_interval : None = jamais de fsync, 0 = fsync après chaque paquet, > 0 = au plus un fsync toutes les N secondes
+    def __init__(self, path, colonnes, batch_size=256, max_delay=0.02, fsync_interval=None):
+        self.path = path
+        self.colonnes = list(colonnes)
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self.fsync_interval = fsync_interval
+        self._file_attente = []                                     # lignes déjà encodées en attente d'écriture
+        self._paquet = _Paquet()                                    # paquet en cours de remplissage
+        self._condition = threading.Condition()
+        self._verrou_fichier = threading.Lock()
+        self._dernier_fsync = 0.0
+        self._thread = threading.Thread(target=self._boucle, name="vote-writer", daemon=True)
+        self._thread.start()
+
+    # Ajoute une ligne à la file d'attente et attend qu'elle soit écrite dans le fichier :
+    def submit(self, ligne):
+        donnees = _encoder([ligne])
+        with self._condition:
+            paquet = self._paquet
+            self._file_attente.append(donnees)
+            self._condition.notify()                                # réveille le thread d'écriture (début du délai ou paquet plein)
+        paquet.ecrit.wait()
+        if paquet.erreur is not None:
+            raise paquet.erreur
+
+    # Exécute fonction() en tenant le verrou du fichier, entre threads et (flock) entre processus : aucun paquet ne peut
+    # être écrit pendant ce temps. Si fonction() remplace le fichier, les écrivains en attente passent au nouveau.
+    def locked(self, fonction):
+        with self._verrou_fichier:
+            fd = self._ouvrir()
+            try:
+                return fonction()
+            finally:
+                os.close(fd)                                        # fermer le descripteur libère aussi le verrou flock
+
+    # Crée le fichier avec son en-tête s'il n'existe pas encore :
+    def create(self):
+        with self._verrou_fichier:
+            self._creer()
+
+    # O_EXCL : un seul créateur, même entre processus. Un autre processus a pu ouvrir le fichier et y écrire un paquet
+    # (en-tête compris) avant qu'on prenne le verrou : on n'écrit alors plus rien.
+    def _creer(self):
+        try:
+            fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+        except FileExistsError:
+            return
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            if os.fstat(fd).st_size == 0:
+                os.write(fd, _encoder([self.colonnes]))
+        finally:
+            os.close(fd)
+
+    # Renomme le fichier en `destination` s'il dépasse min_size octets (-1 : toujours) et le remplace par un fichier qui
+    # ne contient que l'en-tête ; renvoie destination, ou None si le fichier n'a pas été renommé. Le verrou flock garantit
+    # qu'aucun processus n'est en train d'écrire dans l'ancien.
+    def rotate(self, destination, min_size=0):
+        with self._verrou_fichier:
+            try:
+                fd = os.open(self.path, os.O_RDONLY)
+            except FileNotFoundError:
+                return None
+            try:
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_EX)
+                if os.fstat(fd).st_size <= min_size:
+                    return None
+                os.replace(self.path, destination)
+                self._creer()
+                return destination
+            finally:
+                os.close(fd)
+
+    def _boucle(self):
+        while True:
+            with self._condition:
+                while not self._file_attente:
+                    self._condition.wait()
+                limite = time.monotonic() + self.max_delay
+                while len(self._file_attente) < self.batch_size:    # on laisse le paquet se remplir jusqu'à la taille ou au délai maximum
+                    reste = limite - time.monotonic()
+                    if reste <= 0:
+                        break
+                    self._condition.wait(reste)
+                donnees = b"".join(self._file_attente)
+                paquet = self._paquet
+                self._file_attente = []
+                self._paquet = _Paquet()
+            try:
+                self._ecrire(donnees)
+            except Exception as erreur:                             # l'erreur est renvoyée à chaque session qui attendait ce paquet
+                paquet.erreur = erreur
+            paquet.ecrit.set()
+
+    # Ajoute les données à la fin du fichier en un seul write(), en écrivant l'en-tête si le fichier est vide :
+    def _ecrire(self, donnees):
+        with self._verrou_fichier:
+            fd = self._ouvrir()
+            try:
+                if os.fstat(fd).st_size == 0:
+                    donnees = _encoder([self.colonnes]) + donnees
+                vue = memoryview(donnees)
+                while vue:                                          # write() peut écrire moins que demandé : on termine le reste
+                    vue = vue[os.write(fd, vue):]
+                self._fsync(fd)
+            finally:
+                os.close(fd)                                        # fermer le descripteur libère aussi le verrou flock
+
+    # Ouvre le fichier en mode ajout et prend le verrou flock. Si un autre processus l'a renommé entre-temps (compaction),
+    # le descripteur désigne l'ancien fichier : on recommence avec le nouveau.
+    def _ouvrir(self):
+        while True:
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            if fcntl is None:
+                return fd
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                if os.path.samestat(os.fstat(fd), os.stat(self.path)):
+                    return fd
+            except FileNotFoundError:
+                pass
+            os.close(fd)
+
+    def _fsync(self, fd):
+        if self.fsync_interval is None:
+            return
+        maintenant = time.monotonic()
+        if maintenant - self._dernier_fsync >= self.fsync_interval:
+            os.fsync(fd)
+            self._dernier_fsync = maintenant
+
+
+# Un paquet regroupe les votes écrits ensemble ; les sessions qui y ont déposé un vote attendent son écriture.
+class _Paquet:
+    __slots__ = ("ecrit", "erreur")
+
+    def __init__(self):
+        self.ecrit = threading.Event()
+        self.erreur = None
+
+
+# Transforme des lignes en texte CSV (une ligne complète terminée par "\n" par vote) :
+def _encoder(lignes):
+    tampon = io.StringIO()
+    csv.writer(tampon, lineterminator="\n").writerows(lignes)
+    return tampon.getvalue().encode("utf-8")
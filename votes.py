@@ -0,0 +1,94 @@
+# --------------------
+# FONCTIONS VOTES
+# --------------------
+# Le stockage des votes se choisit avec des variables d'environnement :
+#   VOTES_BACKEND = "csv" (par défaut) ou "sqlite"
+#   VOTES_FILE    = chemin du fichier (par défaut "votes.csv" ou "votes.db")
+#   VOTES_FSYNC   = fsync du fichier CSV : non défini = jamais (par défaut), 0 = après chaque paquet de votes,
+#                   N = au plus une fois toutes les N secondes (un vote écrit ne peut alors être perdu qu'en cas de panne du système)
+# et les règles de vote par utilisateur (voir vote_policy.py) avec :
+#   VOTES_WINDOW  = un seul vote par utilisateur pendant ce nombre de secondes (par défaut 5, 0 pour désactiver)
+#   VOTES_BURST   = nombre maximal de votes d'affilée (par défaut 10)
+#   VOTES_REFILL  = secondes pour regagner un vote une fois la rafale épuisée (par défaut 60, 0 pour ne pas limiter le débit)
+
+import os
+import threading
+import time
+
+from profiler import profiler
+from vote_policy import VoteDecision, VotePolicy
+from vote_storage import open_storage
+
+VOTES_BACKEND = os.environ.get("VOTES_BACKEND", "csv")
+VOTES_FILE = os.environ.get("VOTES_FILE", "votes.db" if VOTES_BACKEND == "sqlite" else "votes.csv")
+VOTES_FSYNC = float(os.environ["VOTES_FSYNC"]) if os.environ.get("VOTES_FSYNC") else None
+
+STATS_MAX_AGE = 1.0                                                # durée (secondes) pendant laquelle les statistiques calculées sont réutilisées
+
+# Stockage partagé par toutes les sessions : ce module n'est importé qu'une fois par processus.
+_storage = open_storage(VOTES_BACKEND, VOTES_FILE, VOTES_FSYNC)
+
+# Index des votants récents, partagé par toutes les sessions du processus :
+_policy = VotePolicy(
+    window=float(os.environ.get("VOTES_WINDOW", 5)),
+    burst=int(os.environ.get("VOTES_BURST", 10)),
+    refill=float(os.environ.get("VOTES_REFILL", 60)),
+)
+
+# Dernières statistiques calculées, partagées par toutes les sessions : les fragments de la page "Votes" de tous les
+# visiteurs se mettent à jour en boucle, mais le stockage n'est interrogé qu'au plus une fois par STATS_MAX_AGE.
+_stats_lock = threading.Lock()
+_stats = (0.0, None)                                                # (instant du calcul, VoteStats)
+
+# Assure que le stockage des votes existe (fichier CSV avec ses colonnes, ou table SQLite) :
+@profiler.timed("storage.init_votes_file")
+def init_votes_file():
+    _storage.init()
+
+# Ajoute un vote et attend qu'il soit enregistré. Le vote d'un utilisateur connecté passe d'abord par les règles de vote
+# (un vote par fenêtre, limite de débit, clé d'idempotence contre les doubles envois) : la décision est renvoyée.
+@profiler.timed("storage.add_vote")
+def add_vote(personnage, camp, username=None, idempotency_key=None):
+    if username is not None:
+        decision = _policy.check(username, idempotency_key)
+        if not decision.allowed:
+            return decision
+    try:
+        _storage.add(personnage, camp, username)
+    except Exception:                                               # vote non enregistré : il ne compte pas dans les règles de vote
+        if username is not None:
+            _policy.release(username, idempotency_key)
+        raise
+    _invalider_stats()
+    return VoteDecision(True)
+
+@profiler.timed("storage.load_votes")
+def load_votes():                                                   # charge tous les votes dans un DataFrame pandas
+    return _storage.load()
+
+@profiler.timed("storage.reset_votes")
+def reset_votes():                                                  # efface tous les votes enregistrés (utilisé pour réinitialiser les votes)
+    _storage.reset()
+    _invalider_stats()
+
+# Statistiques des votes (total, camps, classement) calculées par le stockage, sans charger tous les votes :
+@profiler.timed("storage.vote_stats")
+def vote_stats():
+    global _stats
+    with _stats_lock:
+        calcul, stats = _stats
+        if stats is None or time.monotonic() - calcul > STATS_MAX_AGE:
+            stats = _storage.stats()
+            _stats = (time.monotonic(), stats)
+        return stats
+
+# Les votes de ce processus sont visibles dès le prochain affichage, sans attendre STATS_MAX_AGE :
+def _invalider_stats():
+    global _stats
+    with _stats_lock:
+        _stats = (0.0, None)
+
+# Votes par tranche de temps ("minute", "heure" ou "jour") lus dans les agrégats, pour les pages de tendances :
+@profiler.timed("storage.vote_rollups")
+def vote_rollups(granularite, since=None):
+    return _storage.rollup(granularite, since)